@@ -1,11 +1,10 @@
 # app.py - Enhanced with no auto-refresh and tile views
 import streamlit as st
-import pandas as pd
 import os
-from datetime import datetime
-import io
+import shutil
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from jobs import JobManager, JobStatus, JobControl
-import time  # <--- ADD THIS LINE
+from excel_io import read_sheet_names, read_sheet_row_counts
 
 st.set_page_config(
     page_title="Email Scraper Pro",
@@ -18,38 +17,72 @@ st.set_page_config(
 if 'disable_refresh' not in st.session_state:
     st.session_state.disable_refresh = True
 
-job_manager = JobManager()
-
-# Custom CSS for tiles
-st.markdown("""
-<style>
-    .file-tile {
-        padding: 20px;
-        border-radius: 10px;
-        border: 2px solid #e0e0e0;
-        margin: 10px 0;
-        background: #f9f9f9;
-    }
-    .file-tile:hover {
-        border-color: #4CAF50;
-        background: #f0f7f0;
-    }
-    .status-badge {
-        padding: 5px 10px;
-        border-radius: 5px;
-        font-size: 12px;
-        font-weight: bold;
-    }
-    .status-processing { background: #2196F3; color: white; }
-    .status-completed { background: #4CAF50; color: white; }
-    .status-failed { background: #f44336; color: white; }
-    .status-paused { background: #FF9800; color: white; }
-    .status-stopped { background: #9E9E9E; color: white; }
-    .status-pending { background: #FFC107; color: black; }
-</style>
-""", unsafe_allow_html=True)
+
+@st.cache_resource
+def get_job_manager():
+    """Shared JobManager for all reruns and sessions"""
+    return JobManager()
+
+
+job_manager = get_job_manager()
+
+
+@st.cache_data(ttl=2, show_spinner=False)
+def get_all_jobs_snapshot():
+    """All jobs, read once and shared by every widget in a rerun"""
+    return job_manager.get_all_jobs()
+
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def get_sheet_names(filepath, mtime):
+    """Get sheet names of a workbook (cached per file path and mtime)"""
+    return read_sheet_names(filepath)
+
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def get_sheet_row_counts(filepath, size, mtime):
+    """Rows per sheet without loading any cells (cached per file path, size and mtime)"""
+    return read_sheet_row_counts(filepath)
+
+
+def queue_toast(message, icon=None):
+    """Show a toast after the st.rerun() that follows a click"""
+    st.session_state['pending_toast'] = (message, icon)
+
+
+def show_pending_toast():
+    """Show the toast queued by the click that triggered this rerun"""
+    if 'pending_toast' in st.session_state:
+        message, icon = st.session_state.pop('pending_toast')
+        st.toast(message, icon=icon)
+
+
+def save_uploaded_file(file):
+    """Stream one uploaded file to the uploads folder in 1 MiB chunks"""
+    filepath = os.path.join(job_manager.uploads_dir, file.name)
+    file.seek(0)
+    with open(filepath, 'wb') as f:
+        shutil.copyfileobj(file, f, length=1 << 20)
+
+
+STATUS_COLORS = {
+    'pending': 'violet',
+    'processing': 'blue',
+    'paused': 'orange',
+    'stopped': 'gray',
+    'completed': 'green',
+    'failed': 'red',
+}
+
+OUTPUT_MIME_TYPES = {
+    '.csv': "text/csv",
+    '.xlsx': "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    '.xls': "application/vnd.ms-excel",
+}
+
 
 st.title("🔍 Email Scraper Pro")
+show_pending_toast()
 st.markdown("**Async processing with pause/stop controls**")
 
 # Sidebar
@@ -57,7 +90,7 @@ with st.sidebar:
     st.header("⚙️ Quick Stats")
     uploaded_count = len(job_manager.get_uploaded_files())
     output_count = len(job_manager.get_output_files())
-    active_jobs = len([j for j in job_manager.get_all_jobs() 
+    active_jobs = len([j for j in get_all_jobs_snapshot()
                       if j['status'] in ['processing', 'pending']])
     
     st.metric("📁 Uploaded Files", uploaded_count)
@@ -92,13 +125,12 @@ with tab1:
             with col2:
                 if st.button("💾 Save to Server", type="primary", use_container_width=True):
                     progress_bar = st.progress(0)
-                    for idx, file in enumerate(uploaded_files):
-                        filepath = os.path.join(job_manager.uploads_dir, file.name)
-                        with open(filepath, 'wb') as f:
-                            f.write(file.getbuffer())
-                        progress_bar.progress((idx + 1) / len(uploaded_files))
-                    st.success(f"✅ Saved {len(uploaded_files)} file(s)!")
-                    time.sleep(1)
+                    with ThreadPoolExecutor(max_workers=8) as executor:
+                        futures = [executor.submit(save_uploaded_file, file) for file in uploaded_files]
+                        for done, future in enumerate(as_completed(futures), start=1):
+                            future.result()
+                            progress_bar.progress(done / len(uploaded_files))
+                    queue_toast(f"Saved {len(uploaded_files)} file(s)!", icon="✅")
                     st.rerun()
     
     st.divider()
@@ -118,14 +150,9 @@ with tab1:
                 if i + j < len(uploaded_files):
                     file_info = uploaded_files[i + j]
                     with col:
-                        with st.container():
-                            st.markdown(f"""
-                            <div class="file-tile">
-                                <h4>📄 {file_info['filename']}</h4>
-                                <p><strong>Size:</strong> {file_info['size'] / 1024:.1f} KB</p>
-                                <p><strong>Uploaded:</strong> {file_info['uploaded_at'][:10]}</p>
-                            </div>
-                            """, unsafe_allow_html=True)
+                        with st.container(border=True):
+                            st.subheader(f"📄 {file_info['filename']}")
+                            st.caption(f"{file_info['size'] / 1024:.1f} KB · Uploaded {file_info['uploaded_at'][:10]}")
                             
                             col_a, col_b = st.columns(2)
                             with col_a:
@@ -135,34 +162,49 @@ with tab1:
                             with col_b:
                                 if st.button("🗑️ Delete", key=f"del_up_{file_info['filename']}", use_container_width=True):
                                     job_manager.delete_uploaded_file(file_info['filename'])
-                                    st.success("Deleted!")
-                                    time.sleep(0.5)
+                                    queue_toast("Deleted!", icon="🗑️")
                                     st.rerun()
                             
                             # Queue modal
                             if st.session_state.get(f"queue_modal_{file_info['filename']}", False):
                                 with st.expander("Select Sheets", expanded=True):
-                                    excel_file = pd.ExcelFile(file_info['filepath'])
+                                    mtime = os.path.getmtime(file_info['filepath'])
+                                    sheet_names = get_sheet_names(file_info['filepath'], mtime)
+                                    row_counts = get_sheet_row_counts(file_info['filepath'], file_info['size'], mtime)
+                                    
+                                    def sheet_label(x, sheet_names=sheet_names, row_counts=row_counts):
+                                        rows = row_counts.get(sheet_names[x])
+                                        return sheet_names[x] if rows is None else f"{sheet_names[x]} ({rows:,} rows)"
+                                    
                                     selected_sheets = st.multiselect(
                                         "Sheets to process",
-                                        range(len(excel_file.sheet_names)),
-                                        format_func=lambda x: excel_file.sheet_names[x],
-                                        default=list(range(min(3, len(excel_file.sheet_names)))),
+                                        range(len(sheet_names)),
+                                        format_func=sheet_label,
+                                        default=list(range(min(3, len(sheet_names)))),
                                         key=f"sheets_modal_{file_info['filename']}"
                                     )
+                                    xlsx_output = st.checkbox(
+                                        "Excel output (.xlsx) - slower to write than the default CSV",
+                                        key=f"xlsx_modal_{file_info['filename']}"
+                                    )
                                     if st.button("✅ Create Job", key=f"create_job_{file_info['filename']}"):
                                         if selected_sheets:
-                                            job_id = job_manager.create_job(file_info['filename'], selected_sheets)
-                                            st.success(f"Job created: {job_id[:8]}")
+                                            job_id = job_manager.create_job(
+                                                file_info['filename'],
+                                                selected_sheets,
+                                                output_format='xlsx' if xlsx_output else 'csv'
+                                            )
+                                            get_all_jobs_snapshot.clear()
+                                            queue_toast(f"Job created: {job_id[:8]}", icon="✅")
                                             st.session_state[f"queue_modal_{file_info['filename']}"] = False
-                                            time.sleep(1)
                                             st.rerun()
 
 # TAB 2: Manage Jobs
-with tab2:
-    st.header("Manage Processing Jobs")
-    
-    all_jobs = job_manager.get_all_jobs()
+@st.fragment(run_every="2s")
+def render_manage_jobs():
+    """Job cards with controls - polls the job store without rerunning the upload tab"""
+    show_pending_toast()
+    all_jobs = get_all_jobs_snapshot()
     
     if not all_jobs:
         st.info("No jobs created yet")
@@ -200,9 +242,9 @@ with tab2:
                     ):
                         new_control = JobControl.PAUSE if job['status'] == 'processing' else JobControl.RUN
                         job_manager.set_job_control(job['job_id'], new_control)
-                        st.success("Control signal sent!")
-                        time.sleep(0.5)
-                        st.rerun()
+                        get_all_jobs_snapshot.clear()
+                        queue_toast("Control signal sent!")
+                        st.rerun(scope="fragment")
                 
                 with col_b:
                     if job['status'] in ['processing', 'paused'] and st.button(
@@ -211,9 +253,9 @@ with tab2:
                         use_container_width=True
                     ):
                         job_manager.set_job_control(job['job_id'], JobControl.STOP)
-                        st.warning("Stop signal sent! Results will be saved.")
-                        time.sleep(0.5)
-                        st.rerun()
+                        get_all_jobs_snapshot.clear()
+                        queue_toast("Stop signal sent! Results will be saved.", icon="⏹️")
+                        st.rerun(scope="fragment")
                 
                 with col_c:
                     if job['status'] in ['completed', 'failed', 'stopped'] and st.button(
@@ -222,39 +264,46 @@ with tab2:
                         use_container_width=True
                     ):
                         job_manager.delete_job(job['job_id'])
-                        st.success("Job deleted!")
-                        time.sleep(0.5)
-                        st.rerun()
+                        get_all_jobs_snapshot.clear()
+                        queue_toast("Job deleted!", icon="🗑️")
+                        st.rerun(scope="fragment")
                 
                 # Show error if failed
                 if job['error']:
                     st.error(f"Error: {job['error']}")
 
+
+with tab2:
+    st.header("Manage Processing Jobs")
+    render_manage_jobs()
+
 # TAB 3: Job Status (same as tab 2 but different view)
-with tab3:
-    st.header("Job Status Overview")
-    
+@st.fragment(run_every="10s")
+def render_job_status():
+    """Job status tiles - reruns on its own every 10s without reloading the page"""
     status_filter = st.multiselect(
         "Filter by status",
         ['pending', 'processing', 'paused', 'stopped', 'completed', 'failed'],
         default=['pending', 'processing', 'paused']
     )
     
-    filtered_jobs = [j for j in job_manager.get_all_jobs() if j['status'] in status_filter]
+    filtered_jobs = [j for j in get_all_jobs_snapshot() if j['status'] in status_filter]
     
     if filtered_jobs:
         for job in filtered_jobs:
-            status_class = f"status-{job['status']}"
-            st.markdown(f"""
-            <div class="file-tile">
-                <h4>📊 {job['filename']}</h4>
-                <span class="{status_class} status-badge">{job['status'].upper()}</span>
-                <p>Progress: {job['progress']:.1f}% | Emails: {job.get('total_emails', 0)}</p>
-            </div>
-            """, unsafe_allow_html=True)
+            with st.container(border=True):
+                st.subheader(f"📊 {job['filename']}")
+                color = STATUS_COLORS.get(job['status'], 'gray')
+                st.markdown(f":{color}[**{job['status'].upper()}**]")
+                st.caption(f"Progress: {job['progress']:.1f}% | Emails: {job.get('total_emails', 0)}")
     else:
         st.info("No jobs matching filter")
 
+
+with tab3:
+    st.header("Job Status Overview")
+    render_job_status()
+
 # TAB 4: Downloads (Tile View)
 with tab4:
     st.header("Download Processed Files")
@@ -266,6 +315,29 @@ with tab4:
     else:
         st.success(f"✅ {len(output_files)} file(s) ready")
         
+        # Archive is only built on request, not on every rerun of the page
+        if len(output_files) > 1 and st.button("📦 Prepare ZIP of all files", key="zip_all_outputs"):
+            import io  # only needed for the bulk download
+            import zipfile
+            
+            # .xlsx is already deflated - store as-is; CSV shrinks a lot even at the
+            # fastest level. download_button keeps the payload in memory either way
+            zip_buffer = io.BytesIO()
+            with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_STORED) as zf:
+                for file_info in output_files:
+                    if file_info['filename'].endswith('.csv'):
+                        zf.write(file_info['filepath'], arcname=file_info['filename'],
+                                 compress_type=zipfile.ZIP_DEFLATED, compresslevel=1)
+                    else:
+                        zf.write(file_info['filepath'], arcname=file_info['filename'])
+            st.download_button(
+                "📦 Download All (.zip)",
+                data=zip_buffer.getvalue(),
+                file_name="scraped_outputs.zip",
+                mime="application/zip",
+                key="dl_all_outputs"
+            )
+        
         # Display in grid
         cols_per_row = 3
         for i in range(0, len(output_files), cols_per_row):
@@ -274,31 +346,29 @@ with tab4:
                 if i + j < len(output_files):
                     file_info = output_files[i + j]
                     with col:
-                        st.markdown(f"""
-                        <div class="file-tile">
-                            <h4>📤 {file_info['filename']}</h4>
-                            <p><strong>Size:</strong> {file_info['size'] / 1024:.1f} KB</p>
-                            <p><strong>Created:</strong> {file_info['created_at'][:10]}</p>
-                        </div>
-                        """, unsafe_allow_html=True)
+                        with st.container(border=True):
+                            st.subheader(f"📤 {file_info['filename']}")
+                            st.caption(f"{file_info['size'] / 1024:.1f} KB · Created {file_info['created_at'][:10]}")
                         
-                        col_x, col_y = st.columns(2)
-                        with col_x:
-                            with open(file_info['filepath'], 'rb') as f:
-                                st.download_button(
-                                    "⬇️ Download",
-                                    data=f,
-                                    file_name=file_info['filename'],
-                                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                                    key=f"dl_{file_info['filename']}",
-                                    use_container_width=True
-                                )
-                        with col_y:
-                            if st.button("🗑️ Delete", key=f"del_out_{file_info['filename']}", use_container_width=True):
-                                job_manager.delete_output_file(file_info['filename'])
-                                st.success("Deleted!")
-                                time.sleep(0.5)
-                                st.rerun()
+                            col_x, col_y = st.columns(2)
+                            with col_x:
+                                with open(file_info['filepath'], 'rb') as f:
+                                    st.download_button(
+                                        "⬇️ Download",
+                                        data=f,
+                                        file_name=file_info['filename'],
+                                        mime=OUTPUT_MIME_TYPES.get(
+                                            os.path.splitext(file_info['filename'])[1],
+                                            "application/octet-stream"
+                                        ),
+                                        key=f"dl_{file_info['filename']}",
+                                        use_container_width=True
+                                    )
+                            with col_y:
+                                if st.button("🗑️ Delete", key=f"del_out_{file_info['filename']}", use_container_width=True):
+                                    job_manager.delete_output_file(file_info['filename'])
+                                    queue_toast("Deleted!", icon="🗑️")
+                                    st.rerun()
 
 st.divider()
 st.caption("⚡ Powered by Async Python | Background processing active")
@@ -0,0 +1,188 @@
+# excel_io.py
+import csv
+import zipfile
+import xml.etree.ElementTree as ET
+
+try:
+    import python_calamine
+    EXCEL_ENGINE = "calamine"
+except ImportError:
+    python_calamine = None
+    EXCEL_ENGINE = None  # let pandas pick its default (openpyxl for .xlsx)
+
+# The only input columns the scrapers read; everything else is dropped at parse time
+INPUT_COLUMNS = ('Website', 'Title', 'Phone Number')
+
+XLSX_NS = {'s': 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'}
+
+
+def open_excel(filepath):
+    """Open a workbook with the fastest available engine"""
+    import pandas as pd  # imported on first use - the app only needs sheet names and row counts
+    return pd.ExcelFile(filepath, engine=EXCEL_ENGINE)
+
+
+def parse_input_sheet(excel_file, sheet_name, **kwargs):
+    """Parse one sheet, keeping only INPUT_COLUMNS (extra kwargs go to ExcelFile.parse)"""
+    return excel_file.parse(sheet_name, usecols=lambda col: col in INPUT_COLUMNS, **kwargs)
+
+
+def _iter_sheet_rows(filepath, sheet_name):
+    """Yield a sheet's rows as plain value lists, header first"""
+    if python_calamine is not None:
+        workbook = python_calamine.CalamineWorkbook.from_path(filepath)
+        yield from workbook.get_sheet_by_name(sheet_name).iter_rows()
+        return
+    
+    from openpyxl import load_workbook
+    workbook = load_workbook(filepath, read_only=True, data_only=True)
+    try:
+        yield from workbook[sheet_name].iter_rows(values_only=True)
+    finally:
+        workbook.close()
+
+
+def _is_blank(value):
+    return value is None or value == ''
+
+
+def read_input_columns(filepath, sheet_name, required=()):
+    """
+    Stream one sheet into {column: list of values} for the INPUT_COLUMNS it has
+    No DataFrame is built, but the rows match what pandas reads: blank rows are kept up to
+    the last row with data in any column (not just the INPUT_COLUMNS), trailing ones are dropped
+    A sheet whose header lacks any of the required columns returns {} without reading its rows
+    """
+    rows = _iter_sheet_rows(filepath, sheet_name)
+    header = next(rows, ())
+    if not set(required).issubset(header):
+        rows.close()
+        return {}
+    wanted = [(i, name) for i, name in enumerate(header) if name in INPUT_COLUMNS]
+    columns = {name: [] for _, name in wanted}
+    blank_run = 0  # fully blank rows seen since the last row with data
+    
+    for row in rows:
+        if all(_is_blank(value) for value in row):
+            blank_run += 1
+            continue
+        for _, name in wanted:
+            columns[name].extend([None] * blank_run)
+        blank_run = 0
+        for i, name in wanted:
+            value = row[i] if i < len(row) else None
+            if value == '':
+                value = None  # calamine gives '' for empty cells, openpyxl None
+            elif isinstance(value, float) and value.is_integer():
+                value = int(value)  # numeric phone cells come back as 5551234567.0
+            columns[name].append(value)
+    return columns
+
+
+def count_sheet_rows(filepath, sheet_name):
+    """
+    Number of rows pandas reads from a sheet, header included, without building a DataFrame
+    Counts up to the last non-blank row - trailing blank (e.g. only formatted) rows are dropped
+    the same way whichever engine is installed, blank rows in between are kept as pandas keeps them
+    """
+    count = 0
+    for number, row in enumerate(_iter_sheet_rows(filepath, sheet_name), 1):
+        if not all(_is_blank(value) for value in row):
+            count = number
+    return count
+
+
+def _xlsx_sheet_names(filepath):
+    """Read sheet names straight from xl/workbook.xml (no shared strings, no cells)"""
+    with zipfile.ZipFile(filepath) as z, z.open('xl/workbook.xml') as f:
+        sheets = ET.parse(f).getroot().find('s:sheets', XLSX_NS)
+        return [s.get('name') for s in sheets]
+
+
+def read_sheet_names(filepath):
+    """Get sheet names without reading any cell data"""
+    try:
+        return _xlsx_sheet_names(filepath)
+    except (zipfile.BadZipFile, KeyError, TypeError, ET.ParseError):
+        pass  # .xls or unusual layout - ask a real engine
+
+    if python_calamine is not None:
+        return python_calamine.CalamineWorkbook.from_path(filepath).sheet_names
+    return open_excel(filepath).sheet_names
+
+
+def read_sheet_row_counts(filepath):
+    """Data rows per sheet from each sheet's <dimension> tag (None when the file does not record it)"""
+    from openpyxl import load_workbook  # imported on first use - keeps the app's cold start light
+    
+    try:
+        workbook = load_workbook(filepath, read_only=True, data_only=True)
+    except Exception:
+        return {}  # .xls or unreadable - just show sheet names
+    try:
+        return {ws.title: ws.max_row - 1 if ws.max_row else None for ws in workbook.worksheets}
+    finally:
+        workbook.close()
+
+
+def write_excel(df, output_path):
+    """Write a DataFrame to .xlsx, flushing each row to disk as it is written"""
+    import pandas as pd
+    with pd.ExcelWriter(output_path, engine='xlsxwriter',
+                        engine_kwargs={'options': {'constant_memory': True}}) as writer:
+        df.to_excel(writer, index=False)
+
+
+def write_table(df, output_path):
+    """Write a DataFrame as CSV or .xlsx, depending on the output file extension"""
+    if output_path.endswith('.csv'):
+        df.to_csv(output_path, index=False)
+    else:
+        write_excel(df, output_path)
+
+
+def _cell(value):
+    """Blank out NaN/None so they are written as empty cells"""
+    return '' if value is None or (isinstance(value, float) and value != value) else value
+
+
+class ResultWriter:
+    """Append result rows to a CSV or .xlsx file as they arrive instead of buffering them"""
+
+    def __init__(self, output_path, columns, xlsx=None):
+        # Pass xlsx explicitly when output_path carries a temporary suffix
+        self.xlsx = not output_path.endswith('.csv') if xlsx is None else xlsx
+        self.rows_written = 0
+        self.closed = False
+        if self.xlsx:
+            import xlsxwriter
+            self._workbook = xlsxwriter.Workbook(output_path, {'constant_memory': True})
+            self._worksheet = self._workbook.add_worksheet()
+            self._worksheet.write_row(0, 0, columns)
+        else:
+            self._file = open(output_path, 'w', newline='', encoding='utf-8')
+            self._csv = csv.writer(self._file)
+            self._csv.writerow(columns)
+
+    def write_rows(self, rows):
+        """Write a batch of row tuples"""
+        for row in rows:
+            self.rows_written += 1
+            if self.xlsx:
+                self._worksheet.write_row(self.rows_written, 0, [_cell(v) for v in row])
+            else:
+                self._csv.writerow([_cell(v) for v in row])
+
+    def flush(self):
+        """Push buffered CSV rows to disk (xlsx is only readable after close)"""
+        if not self.xlsx:
+            self._file.flush()
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        if self.xlsx:
+            self._workbook.close()
+        else:
+            self._file.close()
@@ -1,37 +1,181 @@
 import pandas as pd
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from bs4 import BeautifulSoup
+import lxml.html
+from lxml import etree
 import re
 import time
-from urllib.parse import urljoin, urlparse
+from urllib.parse import urljoin, urlparse, unquote
 from urllib.robotparser import RobotFileParser
-import random
 import os
+import threading
+import multiprocessing
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
 from datetime import datetime
+from excel_io import open_excel, parse_input_sheet, count_sheet_rows, write_table
+from urls import canonical_link, website_key
+
+try:
+    import re2  # google-re2: linear-time DFA matching, no backtracking on huge pages
+except ImportError:
+    re2 = re
+
+MAX_SCRAPE_WORKERS = 16
+PAGE_FETCH_WORKERS = 4  # pages of one website fetched at the same time
+PARSE_WORKERS = min(8, os.cpu_count() or 1)  # processes scanning downloaded pages
+PER_DOMAIN_CONCURRENCY = 2
+STATUS_INTERVAL = 0.2  # seconds between progress lines (<= 5 per second)
+DOMAIN_REQUEST_INTERVAL = 0.25  # seconds between requests to the same domain
+MAX_PAGE_BYTES = 512_000  # stop downloading a page past this size
+MAX_RETRY_AFTER = 60  # cap on a server's Retry-After / default back-off, in seconds
+SITE_TIME_BUDGET = 20  # seconds - no new crawl level is started for a website after this
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+
+EMAIL_RE = re2.compile(r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}')
+PHONE_STRIP_RE = re.compile(r'[\(\)\-\s\.]')
+PHONE_TRIM_RE = re.compile(r'^[^\d]+|[^\d]+$')
+
+BLOCKED_DOMAINS = frozenset({
+    'estatesales.net',
+    'estatesales.org',
+    'godaddy.com',
+    'hibid.com',
+    'bluemoonestatesales.com',
+    'galleryauctions.com'
+})
+
+SKIP_EXTENSIONS = frozenset({'.jpg', '.jpeg', '.png', '.gif', '.pdf', '.doc', '.docx',
+                             '.xlsx', '.xls', '.zip', '.rar', '.mp4', '.avi', '.mov'})
+
+# Tag/category/author archives and pagination rarely add contact details but eat the domain budget
+LOW_VALUE_LINK_RE = re.compile(r'/(tag|category|page|author)/|[?&](page|paged)=\d', re.IGNORECASE)
+
+UNWANTED_PATTERNS = (
+    'wix', 'example', 'domain', 'sentry',
+    'webp', 'jpg', 'png'
+)
+# One case-insensitive scan per email instead of a Python loop over the patterns
+UNWANTED_RE = re.compile('|'.join(map(re.escape, UNWANTED_PATTERNS)), re.IGNORECASE)
+
+_http_session = None
+_http_session_lock = threading.Lock()
+
+_parse_pool = None
+_parse_pool_lock = threading.Lock()
+
+# Earliest monotonic time the next request to a domain may start
+_next_request_at = {}
+_next_request_lock = threading.Lock()
+
+# robots.txt is fetched once per (scheme, host) and shared by every scraper thread
+_robots_cache = {}
+_robots_locks = {}
+_robots_locks_guard = threading.Lock()
+
+
+def get_http_session():
+    """Process-wide requests.Session shared by every EmailScraper (keep-alive, pooled connections)"""
+    global _http_session
+    with _http_session_lock:
+        if _http_session is None:
+            session = requests.Session()
+            session.headers['User-Agent'] = USER_AGENT
+            # Transient errors are retried on the pooled connection; the last response is
+            # returned so raise_for_status() still reports it. Rate limits (429/503
+            # Retry-After) are handled per domain by wait_for_domain/back_off_domain
+            retry = Retry(total=2, backoff_factor=0.5, status_forcelist=(500, 502, 503, 504),
+                          raise_on_status=False, respect_retry_after_header=False)
+            adapter = HTTPAdapter(pool_connections=64, pool_maxsize=64, max_retries=retry)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            _http_session = session
+    return _http_session
+
+
+def parse_page(html):
+    """Split a page into (href of every <a>, text to scan for emails)
+    Scripts and styles are left out of the text, except JSON-LD which often carries the contact email.
+    Falls back to BeautifulSoup and the raw HTML for markup lxml rejects"""
+    try:
+        doc = lxml.html.fromstring(html)
+    except (etree.ParserError, ValueError):
+        soup = BeautifulSoup(html, 'html.parser')
+        return [link['href'] for link in soup.find_all('a', href=True)], html
+
+    hrefs = doc.xpath('//a/@href')
+    for node in doc.xpath('//script[not(@type="application/ld+json")] | //style'):
+        node.drop_tree()
+    # Join text nodes with spaces so "a@b.com</td><td>Tel" can't run together into one match
+    return hrefs, ' '.join(doc.itertext())
+
+
+def find_emails(text, hrefs=()):
+    """Extract email addresses from text and mailto: links, and filter unwanted ones"""
+    found_emails = set(EMAIL_RE.findall(text))
+    for href in hrefs:
+        if href[:7].lower() == 'mailto:':
+            found_emails.update(EMAIL_RE.findall(unquote(href[7:].split('?')[0])))
+
+    # Filter out emails containing unwanted patterns
+    return {email for email in found_emails if not UNWANTED_RE.search(email)}
+
+
+def scan_page(html):
+    """(links, emails) of one downloaded page - runs in the parse pool"""
+    hrefs, text = parse_page(html)
+    return hrefs, find_emails(text, hrefs)
+
+
+def get_parse_pool():
+    """Process pool for page scans, so parsing/regex work is not serialized on the GIL
+    Workers are spawned, not forked, because scraper threads are already running"""
+    global _parse_pool
+    with _parse_pool_lock:
+        if _parse_pool is None:
+            _parse_pool = ProcessPoolExecutor(max_workers=PARSE_WORKERS,
+                                              mp_context=multiprocessing.get_context('spawn'))
+    return _parse_pool
+
+
+def wait_for_domain(domain):
+    """Reserve the domain's next request slot and sleep until it opens"""
+    with _next_request_lock:
+        now = time.monotonic()
+        slot = max(now, _next_request_at.get(domain, 0.0))
+        _next_request_at[domain] = slot + DOMAIN_REQUEST_INTERVAL
+    if slot > now:
+        time.sleep(slot - now)
+
+
+def back_off_domain(domain, response):
+    """Hold off a domain that answered 429/503, honouring Retry-After (in seconds) when given"""
+    try:
+        delay = min(MAX_RETRY_AFTER, max(0, int(response.headers.get('Retry-After', ''))))
+    except ValueError:
+        delay = 5
+    with _next_request_lock:
+        _next_request_at[domain] = max(_next_request_at.get(domain, 0.0), time.monotonic() + delay)
+
 
 class EmailScraper:
-    def __init__(self):
+    def __init__(self, session=None):
+        self.session = session or get_http_session()
         self.visited_urls = set()
         self.emails = set()
-        self.scraped_domains = {}  # Track domains and number of URLs scraped
+        self.scraped_domains = Counter()  # Track domains and number of URLs scraped
         self.headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+            'User-Agent': USER_AGENT
         }
 
-        self.blocked_domains = [
-            'estatesales.net',
-            'estatesales.org',
-            'godaddy.com',
-            'hibid.com',
-            'bluemoonestatesales.com',
-            'galleryauctions.com'
-        ]
+        self.blocked_domains = BLOCKED_DOMAINS
 
         self.MAX_URLS_PER_DOMAIN = 15
-        self.unwanted_patterns = [
-            'wix', 'example', 'domain', 'sentry',
-            'webp', 'jpg', 'png'
-        ]
+        self._page_pool = None  # created on first crawl
+        self.unwanted_patterns = UNWANTED_PATTERNS
 
     def is_blocked_domain(self, url):
         """Check if URL belongs to blocked domains"""
@@ -58,122 +202,209 @@ class EmailScraper:
         domain = self.get_domain(url)
         if not domain:
             return False
-        return self.scraped_domains.get(domain, 0) < self.MAX_URLS_PER_DOMAIN
-
-    def extract_emails(self, text):
-        """Extract email addresses from text and filter unwanted ones"""
-        email_pattern = r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}'
-        found_emails = set(re.findall(email_pattern, text))
+        return self.scraped_domains[domain] < self.MAX_URLS_PER_DOMAIN
 
-        # Filter out emails containing unwanted patterns
-        filtered_emails = set()
-        for email in found_emails:
-            if not any(pattern.lower() in email.lower() for pattern in self.unwanted_patterns):
-                filtered_emails.add(email)
-
-        return filtered_emails
+    def extract_emails(self, text, hrefs=()):
+        """Extract email addresses from text and mailto: links, and filter unwanted ones"""
+        return find_emails(text, hrefs)
 
     def should_skip_url(self, url):
         """Check if URL should be skipped based on extension or other criteria"""
-        skip_extensions = {'.jpg', '.jpeg', '.png', '.gif', '.pdf', '.doc', '.docx',
-                          '.xlsx', '.xls', '.zip', '.rar', '.mp4', '.avi', '.mov'}
         try:
             parsed_url = urlparse(url)
             path = parsed_url.path.lower()
-            return any(path.endswith(ext) for ext in skip_extensions)
+            return os.path.splitext(path)[1] in SKIP_EXTENSIONS
         except Exception:
             return True
 
-    def get_internal_links(self, soup, base_url):
-        """Get all internal links from a page"""
-        internal_links = set()
+    def get_internal_links(self, hrefs, base_url, limit, skip=()):
+        """Yield at most limit new internal links from a page, stopping as soon as the budget is used"""
         domain = urlparse(base_url).netloc
         base_domain = domain.lower().replace('www.', '')
+        found = set()
+
+        for href in hrefs:
+            if len(found) >= limit:
+                return
 
-        for link in soup.find_all('a', href=True):
-            url = urljoin(base_url, link['href'])
+            url = canonical_link(urljoin(base_url, href))
 
-            if self.should_skip_url(url):
+            if LOW_VALUE_LINK_RE.search(url):
+                continue
+
+            if url in found or url in skip or url in self.visited_urls or self.should_skip_url(url):
                 continue
 
             try:
                 url_domain = urlparse(url).netloc.lower().replace('www.', '')
-                if url_domain == base_domain:
-                    internal_links.add(url)
             except Exception:
                 continue
 
-            if not self.can_scrape_domain(url):
-                break
+            if url_domain == base_domain:
+                found.add(url)
+                yield url
+
+    def fetch_page(self, url):
+        """Download one page, returning its HTML or None on failure"""
+        domain = self.get_domain(url)
+        try:
+            wait_for_domain(domain)
+            with self.session.get(url, timeout=10, stream=True) as response:
+                if response.status_code in (429, 503):
+                    back_off_domain(domain, response)
+                response.raise_for_status()
+
+                # Contact details and nav links sit near the top - don't pull multi-MB pages whole
+                chunks = []
+                size = 0
+                for chunk in response.iter_content(chunk_size=16384):
+                    chunks.append(chunk)
+                    size += len(chunk)
+                    if size >= MAX_PAGE_BYTES:
+                        break
+                return b''.join(chunks).decode(response.encoding or 'utf-8', errors='replace')
+        except Exception as e:
+            print(f"Error scraping {url}: {str(e)}")
+            return None
 
-        return internal_links
+    def scrape_page(self, url, max_depth=2):
+        """Scrape a page and its internal links up to max_depth, one level at a time
+        Pages of the same level are fetched concurrently; deeper levels stop after SITE_TIME_BUDGET"""
+        if self._page_pool is None:
+            self._page_pool = ThreadPoolExecutor(max_workers=PAGE_FETCH_WORKERS)
+
+        deadline = time.monotonic() + SITE_TIME_BUDGET
+        level = [canonical_link(url)]
+        for depth in range(max_depth + 1):
+            if depth and time.monotonic() > deadline:
+                break  # keep what the earlier levels found; one slow site must not hold a worker
+            batch = []
+            for page_url in level:
+                if page_url in self.visited_urls:
+                    continue
 
-    def scrape_page(self, url, max_depth=2, current_depth=0):
-        """Scrape a page and its internal links up to max_depth"""
-        if current_depth > max_depth or url in self.visited_urls:
-            return
+                if (self.is_blocked_domain(page_url) or
+                    self.should_skip_url(page_url) or
+                    not self.can_scrape_domain(page_url)):
+                    continue
 
-        if (self.is_blocked_domain(url) or 
-            self.should_skip_url(url) or 
-            not self.can_scrape_domain(url)):
-            return
+                if not self.is_allowed_by_robots(page_url):
+                    print(f"Skipping {page_url} (not allowed by robots.txt)")
+                    continue
 
-        if not self.is_allowed_by_robots(url):
-            print(f"Skipping {url} (not allowed by robots.txt)")
-            return
+                self.visited_urls.add(page_url)
+                domain = self.get_domain(page_url)
+                if domain:
+                    self.scraped_domains[domain] += 1
+                batch.append(page_url)
 
-        self.visited_urls.add(url)
-        domain = self.get_domain(url)
-        if domain:
-            self.scraped_domains[domain] = self.scraped_domains.get(domain, 0) + 1
+            if not batch:
+                break
 
-        try:
-            time.sleep(random.uniform(1, 3))
-            response = requests.get(url, headers=self.headers, timeout=10)
-            response.raise_for_status()
+            pages = [(page_url, html)
+                     for page_url, html in zip(batch, self._page_pool.map(self.fetch_page, batch))
+                     if html is not None]
+            scans = get_parse_pool().map(scan_page, [html for _, html in pages])
 
-            print(f"Scraping: {url} ({self.scraped_domains.get(domain, 0)}/{self.MAX_URLS_PER_DOMAIN} URLs for this domain)")
+            next_level = {}  # insertion-ordered set of links for the next level
+            for (page_url, _), (hrefs, emails) in zip(pages, scans):
+                domain = self.get_domain(page_url)
+                print(f"Scraping: {page_url} ({self.scraped_domains[domain]}/{self.MAX_URLS_PER_DOMAIN} URLs for this domain)")
 
-            soup = BeautifulSoup(response.text, 'html.parser')
-            emails = self.extract_emails(response.text)
-            self.emails.update(emails)
+                self.emails.update(emails)
 
-            if current_depth < max_depth and self.can_scrape_domain(url):
-                internal_links = self.get_internal_links(soup, url)
-                for link in internal_links:
-                    if self.can_scrape_domain(link):
-                        self.scrape_page(link, max_depth, current_depth + 1)
+                # Links already queued for the next level count against the domain budget
+                budget = self.MAX_URLS_PER_DOMAIN - self.scraped_domains[domain] - len(next_level)
+                if depth < max_depth and budget > 0:
+                    next_level.update(dict.fromkeys(self.get_internal_links(hrefs, page_url, budget, next_level)))
 
-        except Exception as e:
-            print(f"Error scraping {url}: {str(e)}")
+            level = next_level
+
+    def fetch_robots(self, scheme, netloc):
+        """Download and parse a host's robots.txt through the pooled session (None if unreachable)"""
+        rp = RobotFileParser()
+        try:
+            response = self.session.get(f"{scheme}://{netloc}/robots.txt", timeout=10)
+        except Exception:
+            return None
+        # Same status handling as RobotFileParser.read()
+        if response.status_code in (401, 403):
+            rp.disallow_all = True
+        elif response.status_code >= 400:
+            rp.allow_all = True
+        else:
+            rp.parse(response.text.splitlines())
+        return rp
+
+    def get_robots_parser(self, url):
+        """Cached robots.txt parser for the URL's host - concurrent first lookups fetch it once"""
+        parsed_url = urlparse(url)
+        key = (parsed_url.scheme, parsed_url.netloc)
+        with _robots_locks_guard:
+            lock = _robots_locks.setdefault(key, threading.Lock())
+        with lock:
+            if key not in _robots_cache:
+                _robots_cache[key] = self.fetch_robots(*key)
+        return _robots_cache[key]
 
     def is_allowed_by_robots(self, url):
         """Check if URL is allowed by robots.txt"""
         try:
-            rp = RobotFileParser()
-            parsed_url = urlparse(url)
-            robots_url = f"{parsed_url.scheme}://{parsed_url.netloc}/robots.txt"
-            rp.set_url(robots_url)
-            rp.read()
-            return rp.can_fetch(self.headers['User-Agent'], url)
+            rp = self.get_robots_parser(url)
+            return rp is None or rp.can_fetch(self.headers['User-Agent'], url)
         except:
             return True
 
 
-def format_phone_number(phone):
-    """Format phone number to +1XXXXXXXXXX format"""
-    if pd.isna(phone):
-        return ""
+def format_phone_numbers(phones):
+    """Format a whole phone column to +1XXXXXXXXXX, with the regexes run once per column
+    Punctuation, spaces and a +1 prefix are stripped; anything that is not 10 digits is kept as cleaned"""
+    cleaned = (phones.astype(object).where(phones.notna(), '').astype(str)
+               .str.replace(PHONE_STRIP_RE, '', regex=True)
+               .str.replace('+1', '', regex=False)
+               .str.replace(PHONE_TRIM_RE, '', regex=True))
+    us_number = (cleaned.str.len() == 10) & cleaned.str.isdigit()
+    return cleaned.mask(us_number, '+1' + cleaned).to_numpy()
+
+
+_thread_state = threading.local()
+
+
+def get_thread_scraper():
+    """Get this thread's EmailScraper, with per-website state cleared"""
+    scraper = getattr(_thread_state, 'scraper', None)
+    if scraper is None:
+        scraper = _thread_state.scraper = EmailScraper()
+    scraper.emails.clear()
+    scraper.visited_urls.clear()
+    scraper.scraped_domains.clear()
+    return scraper
+
+
+def scrape_website_emails(website, domain_slot):
+    """Scrape one website with the calling thread's EmailScraper
+    Returns (values for the Email column, domains scraped)"""
+    row_scraper = get_thread_scraper()
 
-    cleaned = str(phone)
-    cleaned = re.sub(r'[\(\)\-\s\.]', '', cleaned)
-    cleaned = cleaned.replace('+1', '')
-    cleaned = re.sub(r'^[^\d]+|[^\d]+$', '', cleaned)
+    try:
+        with domain_slot:
+            row_scraper.scrape_page(website, max_depth=2)
+        emails = list(row_scraper.emails) or ['No email found']
 
-    if len(cleaned) == 10 and cleaned.isdigit():
-        return f"+1{cleaned}"
+    except Exception as e:
+        print(f"Error processing {website}: {str(e)}")
+        emails = [f'Error: {str(e)}']
 
-    return cleaned
+    return emails, set(row_scraper.scraped_domains)
+
+
+# Column order of the result tuples built below (and of the output file)
+RESULT_COLUMNS = ['Row Number', 'Company', 'Phone Number', 'Website', 'Email', 'City']
+
+
+def build_result_rows(original_idx, company, website, formatted_phone, sheet_name, emails):
+    """One result row per email found for a row's website, laid out as RESULT_COLUMNS"""
+    return [(original_idx, company, formatted_phone, website, email, sheet_name) for email in emails]
 
 
 def get_excel_file_path():
@@ -191,6 +422,17 @@ def get_excel_file_path():
             print("Error: File not found. Please enter a valid path")
 
 
+def get_output_format():
+    """Ask whether to save results as .xlsx or CSV"""
+    while True:
+        choice = input("\nSave results as (x)lsx or (c)sv? CSV is much faster for large runs [x]: ").strip().lower()
+        if choice in ('', 'x', 'xlsx'):
+            return 'xlsx'
+        if choice in ('c', 'csv'):
+            return 'csv'
+        print("Please enter x or c")
+
+
 def get_sheet_selection(total_sheets):
     """Prompt user to select which sheets to scrape"""
     while True:
@@ -281,7 +523,7 @@ def create_output_directory():
     return date_dir
 
 
-def generate_unique_filename(output_dir, source_file, sheet_names, row_range=None):
+def generate_unique_filename(output_dir, source_file, sheet_names, row_range=None, extension='xlsx'):
     """Generate unique filename based on source file name and sheets"""
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     source_name = os.path.splitext(os.path.basename(source_file))[0]
@@ -298,7 +540,7 @@ def generate_unique_filename(output_dir, source_file, sheet_names, row_range=Non
     else:
         range_str = ""
 
-    base_filename = f"{source_name}_{sheet_str}{range_str}_{timestamp}.xlsx"
+    base_filename = f"{source_name}_{sheet_str}{range_str}_{timestamp}.{extension}"
     return os.path.join(output_dir, base_filename)
 
 
@@ -313,7 +555,7 @@ def main():
 
     output_dir = create_output_directory()
 
-    xl = pd.ExcelFile(file_path)
+    xl = open_excel(file_path)
     selected_sheet_indices = get_sheet_selection(len(xl.sheet_names))
     selected_sheet_names = [xl.sheet_names[i] for i in selected_sheet_indices]
 
@@ -321,115 +563,132 @@ def main():
     for idx, sheet_name in zip(selected_sheet_indices, selected_sheet_names):
         print(f"Sheet {idx + 1}: {sheet_name}")
 
+    output_format = get_output_format()
+
     all_results = []
-    scraper = EmailScraper()
+    scraper = EmailScraper()  # only used for the blocked-domain/domain helpers here
+    domain_slots = {}
+    scraped_domains = set()
+    website_emails = {}  # website_key -> Email column values, reused by repeat rows in any sheet
 
     for sheet_idx in selected_sheet_indices:
         sheet_name = xl.sheet_names[sheet_idx]
         print(f"\nProcessing sheet {sheet_idx + 1}: {sheet_name}")
 
-        df = xl.parse(sheet_name)
-
-        if 'Website' not in df.columns or 'Title' not in df.columns:
+        # Header only first - sheets without the required columns cost no full parse
+        columns = parse_input_sheet(xl, sheet_name, nrows=0).columns
+        if 'Website' not in columns or 'Title' not in columns:
             print(f"Warning: Sheet '{sheet_name}' missing required columns (Website, Title). Skipping...")
             continue
 
         # Get row range for this sheet
-        total_rows = len(df) + 1  # +1 to account for header in user's perspective
+        total_rows = count_sheet_rows(file_path, sheet_name)  # includes the header row
         start_idx, end_idx = get_row_range(total_rows)
+        read_all = start_idx == 0 and end_idx == total_rows
 
-        # Slice the dataframe
-        if start_idx == 0 and end_idx == total_rows:
-            df_subset = df
-            print(f"\nProcessing all {len(df)} rows")
+        if read_all:
+            print(f"\nProcessing all {total_rows - 1} rows")
         else:
-            df_subset = df.iloc[start_idx:end_idx]
-            print(f"\nProcessing rows {start_idx+2} to {end_idx+1} ({len(df_subset)} rows)")
+            print(f"\nProcessing rows {start_idx+2} to {end_idx+1} ({end_idx - start_idx} rows)")
 
         proceed = input("\nProceed with scraping these rows? (y/n): ").strip().lower()
         if proceed != 'y':
             print("Skipping this sheet.")
             continue
 
-        for original_idx, (index, row) in enumerate(df_subset.iterrows(), start=start_idx+2):
-            website = row['Website']
-            company = row['Title']
-            phone = row.get('Phone Number', '')
-            formatted_phone = format_phone_number(phone)
-
-            print(f"\n[Row {original_idx}] Processing {company}: {website}")
-
-            if pd.isna(website) or not website or not isinstance(website, str):
-                print(f"Invalid website URL for {company}: {website}")
-                all_results.append({
-                    'Row Number': original_idx,
-                    'Company': company,
-                    'Website': website if not pd.isna(website) else "No website provided",
-                    'Phone Number': formatted_phone,
-                    'Email': 'No website provided',
-                    'City': sheet_name
-                })
+        # Only the selected range is read from the workbook
+        if read_all:
+            df_subset = parse_input_sheet(xl, sheet_name)
+        else:
+            df_subset = parse_input_sheet(xl, sheet_name,
+                                          skiprows=range(1, start_idx + 1),
+                                          nrows=end_idx - start_idx)
+
+        sheet_start = len(all_results)
+        scrape_jobs = {}  # website_key -> rows waiting on it
+
+        # Column arrays instead of iterrows() - no Series built per row
+        websites = df_subset['Website'].to_numpy()
+        companies = df_subset['Title'].to_numpy()
+        if 'Phone Number' in df_subset.columns:
+            formatted_phones = format_phone_numbers(df_subset['Phone Number'])
+        else:
+            formatted_phones = [''] * len(df_subset)
+        has_website = df_subset['Website'].map(lambda w: isinstance(w, str) and w != '').to_numpy()
+
+        # About 20 row status lines per sheet instead of one line per row
+        update_stride = max(1, len(df_subset) // 20)
+        no_website_rows = blocked_rows = 0
+
+        rows = zip(websites, companies, formatted_phones, has_website)
+        for i, (website, company, formatted_phone, valid) in enumerate(rows):
+            original_idx = start_idx + 2 + i
+
+            if (i + 1) % update_stride == 0 or i + 1 == len(df_subset):
+                print(f"[Row {original_idx}] Prepared {i + 1}/{len(df_subset)} rows of {sheet_name}")
+
+            if not valid:
+                no_website_rows += 1
+                all_results.extend(build_result_rows(original_idx, company,
+                                                     website if not pd.isna(website) else "No website provided",
+                                                     formatted_phone, sheet_name, ['No website provided']))
                 continue
 
             elif scraper.is_blocked_domain(website):
-                print(f"Skipping blocked domain: {website}")
-                all_results.append({
-                    'Row Number': original_idx,
-                    'Company': company,
-                    'Website': website,
-                    'Phone Number': formatted_phone,
-                    'Email': 'Blocked domain',
-                    'City': sheet_name
-                })
+                blocked_rows += 1
+                all_results.extend(build_result_rows(original_idx, company, website, formatted_phone,
+                                                     sheet_name, ['Blocked domain']))
                 continue
 
-            scraper.emails = set()
+            key = website_key(website)
+            if key in website_emails:
+                # Same website already scraped for an earlier row
+                all_results.extend(build_result_rows(original_idx, company, website, formatted_phone,
+                                                     sheet_name, website_emails[key]))
+                continue
 
-            try:
-                scraper.scrape_page(website, max_depth=2)
-
-                if scraper.emails:
-                    for email in scraper.emails:
-                        all_results.append({
-                            'Row Number': original_idx,
-                            'Company': company,
-                            'Website': website,
-                            'Phone Number': formatted_phone,
-                            'Email': email,
-                            'City': sheet_name
-                        })
-                else:
-                    all_results.append({
-                        'Row Number': original_idx,
-                        'Company': company,
-                        'Website': website,
-                        'Phone Number': formatted_phone,
-                        'Email': 'No email found',
-                        'City': sheet_name
-                    })
-
-            except Exception as e:
-                print(f"Error processing {website}: {str(e)}")
-                all_results.append({
-                    'Row Number': original_idx,
-                    'Company': company,
-                    'Website': website,
-                    'Phone Number': formatted_phone,
-                    'Email': f'Error: {str(e)}',
-                    'City': sheet_name
-                })
+            scrape_jobs.setdefault(key, []).append((original_idx, company, website, formatted_phone, sheet_name))
+
+        if no_website_rows or blocked_rows:
+            print(f"Skipped {no_website_rows} rows without a valid website and {blocked_rows} blocked domains")
+
+        if scrape_jobs:
+            print(f"\nScraping {len(scrape_jobs)} websites with {MAX_SCRAPE_WORKERS} workers...")
+            with ThreadPoolExecutor(max_workers=MAX_SCRAPE_WORKERS) as executor:
+                futures = {}
+                for key, jobs in scrape_jobs.items():
+                    website = jobs[0][2]  # scraped as the first row spelled it
+                    domain_slot = domain_slots.setdefault(scraper.get_domain(website),
+                                                          threading.Semaphore(PER_DOMAIN_CONCURRENCY))
+                    futures[executor.submit(scrape_website_emails, website, domain_slot)] = key
+                last_status = 0.0
+                for done, future in enumerate(as_completed(futures), start=1):
+                    key = futures[future]
+                    emails, row_domains = future.result()
+                    website_emails[key] = emails
+                    for job in scrape_jobs[key]:
+                        all_results.extend(build_result_rows(*job, emails))
+                    scraped_domains.update(row_domains)
+
+                    # Status line at most STATUS_INTERVAL apart (always show the last one)
+                    now = time.monotonic()
+                    if now - last_status >= STATUS_INTERVAL or done == len(futures):
+                        print(f"Progress {sheet_name}: {done}/{len(futures)} websites scraped")
+                        last_status = now
+
+            # Workers finish out of order - restore row order for this sheet
+            all_results[sheet_start:] = sorted(all_results[sheet_start:], key=lambda r: r[0])
 
     if all_results:
-        results_df = pd.DataFrame(all_results)
+        # Tuples with known columns - no per-row dicts to build or scan for keys
+        results_df = pd.DataFrame(all_results, columns=RESULT_COLUMNS)
         results_df = results_df.drop_duplicates()
 
-        column_order = ['Row Number', 'Company', 'Phone Number', 'Website', 'Email', 'City']
-        results_df = results_df[column_order]
-
         output_filename = generate_unique_filename(output_dir, file_path, selected_sheet_names, 
-                                                   (start_idx, end_idx) if start_idx != 0 or end_idx != total_rows else None)
+                                                   (start_idx, end_idx) if start_idx != 0 or end_idx != total_rows else None,
+                                                   output_format)
 
-        results_df.to_excel(output_filename, index=False)
+        write_table(results_df, output_filename)
         print(f"\nScraping completed. Results saved to '{output_filename}'")
 
         summary = {
@@ -441,14 +700,14 @@ def main():
             'Total Websites Processed': len(set(results_df['Website'])),
             'Total Emails Found': len(results_df[~results_df['Email'].isin(['No email found', 'No website provided', 'Blocked domain']) & 
                                                  ~results_df['Email'].str.startswith('Error:')]),
-            'Domains Scraped': len(scraper.scraped_domains)
+            'Domains Scraped': len(scraped_domains)
         }
 
         summary_df = pd.DataFrame([summary])
         source_name = os.path.splitext(os.path.basename(file_path))[0]
-        summary_filename = os.path.join(output_dir, f"{source_name}_summary_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx")
+        summary_filename = os.path.join(output_dir, f"{source_name}_summary_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{output_format}")
 
-        summary_df.to_excel(summary_filename, index=False)
+        write_table(summary_df, summary_filename)
         print(f"Summary saved to '{summary_filename}'")
 
     else:
@@ -5,6 +5,19 @@ from datetime import datetime
 from enum import Enum
 import uuid
 
+try:
+    import orjson  # C encoder/decoder - job files are rewritten on every progress update
+except ImportError:
+    orjson = None
+
+
+def _dumps(job):
+    return orjson.dumps(job) if orjson is not None else json.dumps(job).encode()
+
+
+def _loads(data):
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
 class JobStatus(Enum):
     PENDING = "pending"
     PROCESSING = "processing"
@@ -30,16 +43,37 @@ class JobManager:
         os.makedirs(outputs_dir, exist_ok=True)
         os.makedirs(uploads_dir, exist_ok=True)
         os.makedirs(control_dir, exist_ok=True)
+        
+        # Jobs this process has updated - only the worker running a job writes its file,
+        # so its copy is authoritative and update_job never has to re-read it
+        self._job_cache = {}
+        self._dirty_jobs = set()  # cached jobs with updates not yet written
+        
+        # One empty marker per pending job, so the worker's poll never opens finished jobs
+        self.pending_dir = os.path.join(jobs_dir, "pending")
+        if not os.path.isdir(self.pending_dir):
+            os.makedirs(self.pending_dir, exist_ok=True)
+            for job in self.get_all_jobs():  # jobs queued before the index existed
+                if job['status'] == JobStatus.PENDING.value:
+                    self._mark_pending(job['job_id'])
+    
+    def _write_job(self, job):
+        """Write a job file atomically (tmp file + rename) so readers never see half a file"""
+        job_file = os.path.join(self.jobs_dir, f"{job['job_id']}.json")
+        tmp_file = f"{job_file}.tmp"
+        with open(tmp_file, 'wb') as f:
+            f.write(_dumps(job))
+        os.replace(tmp_file, job_file)
     
-    def create_job(self, filename, selected_sheets):
-        """Create a new job"""
+    def create_job(self, filename, selected_sheets, output_format='csv'):
+        """Create a new job (output_format is 'csv' or 'xlsx')"""
         job_id = str(uuid.uuid4())
         job = {
             'job_id': job_id,
             'filename': filename,
             'selected_sheets': selected_sheets,
+            'output_format': output_format,
             'status': JobStatus.PENDING.value,
-            'control': JobControl.RUN.value,
             'created_at': datetime.now().isoformat(),
             'started_at': None,
             'completed_at': None,
@@ -49,47 +83,91 @@ class JobManager:
             'total_rows': 0,
             'total_emails': 0,
             'error': None,
-            'output_file': None,
-            'partial_results': []  # Store partial results
+            'output_file': None  # partial results are streamed to their own output file
         }
         
-        job_file = os.path.join(self.jobs_dir, f"{job_id}.json")
-        with open(job_file, 'w') as f:
-            json.dump(job, f, indent=2)
-        
+        self._write_job(job)
+        self._mark_pending(job_id)
         return job_id
     
+    def _mark_pending(self, job_id):
+        open(os.path.join(self.pending_dir, job_id), 'w').close()
+    
+    def _unmark_pending(self, job_id):
+        try:
+            os.remove(os.path.join(self.pending_dir, job_id))
+        except FileNotFoundError:
+            pass
+    
     def get_job(self, job_id):
         """Get job details"""
+        if job_id in self._job_cache:
+            return dict(self._job_cache[job_id])
         job_file = os.path.join(self.jobs_dir, f"{job_id}.json")
-        if os.path.exists(job_file):
-            with open(job_file, 'r') as f:
-                return json.load(f)
-        return None
+        try:
+            with open(job_file, 'rb') as f:
+                return _loads(f.read())
+        except FileNotFoundError:
+            return None
     
-    def update_job(self, job_id, updates):
-        """Update job status"""
-        job = self.get_job(job_id)
+    def update_job(self, job_id, updates, flush=True):
+        """Update job status (flush=False only buffers it until the next flush_job)"""
+        job = self._job_cache.get(job_id) or self.get_job(job_id)
         if job:
             job.update(updates)
-            job_file = os.path.join(self.jobs_dir, f"{job_id}.json")
-            with open(job_file, 'w') as f:
-                json.dump(job, f, indent=2)
+            self._job_cache[job_id] = job
+            if updates.get('status', JobStatus.PENDING.value) != JobStatus.PENDING.value:
+                self._unmark_pending(job_id)
+            self._dirty_jobs.add(job_id)
+            if flush:
+                self.flush_job(job_id)
+    
+    def flush_job(self, job_id):
+        """Write buffered updates for a job, if there are any"""
+        if job_id in self._dirty_jobs:
+            self._dirty_jobs.discard(job_id)
+            self._write_job(self._job_cache[job_id])
     
     def set_job_control(self, job_id, control: JobControl):
         """Set job control signal (pause/stop/run)"""
-        self.update_job(job_id, {'control': control.value})
+        # Kept out of the job file so the app never races the worker that owns it
+        control_file = os.path.join(self.control_dir, f"{job_id}.ctl")
+        with open(f"{control_file}.tmp", 'w') as f:
+            f.write(control.value)
+        os.replace(f"{control_file}.tmp", control_file)
     
     def get_job_control(self, job_id) -> str:
-        """Get current control signal"""
-        job = self.get_job(job_id)
-        return job.get('control', JobControl.RUN.value) if job else JobControl.RUN.value
+        """Get current control signal (one small read, no JSON)"""
+        control_file = os.path.join(self.control_dir, f"{job_id}.ctl")
+        try:
+            with open(control_file, 'rb') as f:
+                return f.read(8).decode().strip() or JobControl.RUN.value
+        except FileNotFoundError:
+            return JobControl.RUN.value
+    
+    def claim_job(self, job_id) -> bool:
+        """Atomically claim a job so only one worker process runs it"""
+        lock_file = os.path.join(self.control_dir, f"{job_id}.lock")
+        try:
+            fd = os.open(lock_file, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            return False
+        with os.fdopen(fd, 'w') as f:
+            f.write(str(os.getpid()))
+        return True
     
     def delete_job(self, job_id):
         """Delete a job"""
         job_file = os.path.join(self.jobs_dir, f"{job_id}.json")
+        self._job_cache.pop(job_id, None)
+        self._dirty_jobs.discard(job_id)
+        self._unmark_pending(job_id)
         if os.path.exists(job_file):
             os.remove(job_file)
+            for suffix in ('.lock', '.ctl'):
+                control_file = os.path.join(self.control_dir, f"{job_id}{suffix}")
+                if os.path.exists(control_file):
+                    os.remove(control_file)
             return True
         return False
     
@@ -107,21 +185,29 @@ class JobManager:
         return jobs
     
     def get_pending_jobs(self):
-        """Get all pending jobs"""
-        return [j for j in self.get_all_jobs() if j['status'] == JobStatus.PENDING.value]
+        """Get all pending jobs (newest first, like get_all_jobs)"""
+        jobs = []
+        for job_id in os.listdir(self.pending_dir):
+            job = self.get_job(job_id)
+            if job and job['status'] == JobStatus.PENDING.value:
+                jobs.append(job)
+        
+        jobs.sort(key=lambda x: x['created_at'], reverse=True)
+        return jobs
     
     def get_uploaded_files(self):
         """Get list of uploaded files"""
         files = []
-        for filename in os.listdir(self.uploads_dir):
-            if filename.endswith(('.xlsx', '.xls')):
-                filepath = os.path.join(self.uploads_dir, filename)
-                files.append({
-                    'filename': filename,
-                    'filepath': filepath,
-                    'size': os.path.getsize(filepath),
-                    'uploaded_at': datetime.fromtimestamp(os.path.getctime(filepath)).isoformat()
-                })
+        with os.scandir(self.uploads_dir) as entries:  # one stat per file, size and ctime from the same call
+            for entry in entries:
+                if entry.name.endswith(('.xlsx', '.xls')):
+                    stat = entry.stat()
+                    files.append({
+                        'filename': entry.name,
+                        'filepath': entry.path,
+                        'size': stat.st_size,
+                        'uploaded_at': datetime.fromtimestamp(stat.st_ctime).isoformat()
+                    })
         files.sort(key=lambda x: x['uploaded_at'], reverse=True)
         return files
     
@@ -136,15 +222,16 @@ class JobManager:
     def get_output_files(self):
         """Get list of output files"""
         files = []
-        for filename in os.listdir(self.outputs_dir):
-            if filename.endswith(('.xlsx', '.xls')):
-                filepath = os.path.join(self.outputs_dir, filename)
-                files.append({
-                    'filename': filename,
-                    'filepath': filepath,
-                    'size': os.path.getsize(filepath),
-                    'created_at': datetime.fromtimestamp(os.path.getctime(filepath)).isoformat()
-                })
+        with os.scandir(self.outputs_dir) as entries:  # one stat per file, size and ctime from the same call
+            for entry in entries:
+                if entry.name.endswith(('.csv', '.xlsx', '.xls')):
+                    stat = entry.stat()
+                    files.append({
+                        'filename': entry.name,
+                        'filepath': entry.path,
+                        'size': stat.st_size,
+                        'created_at': datetime.fromtimestamp(stat.st_ctime).isoformat()
+                    })
         files.sort(key=lambda x: x['created_at'], reverse=True)
         return files
     
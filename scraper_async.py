@@ -1,40 +1,199 @@
 # scraper_async.py
 import aiohttp
 import asyncio
-from bs4 import BeautifulSoup
+import lxml.html
+from lxml import etree
 import re
+import multiprocessing
+import os
 import pandas as pd
-from urllib.parse import urljoin, urlparse
-from typing import Set, List
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from functools import lru_cache
+from urllib.parse import urljoin, urlparse, urlsplit
+from typing import Dict, Set, List, Tuple
 import logging
+from contextlib import aclosing
+from urls import canonical_link
+
+try:
+    import re2  # google-re2: linear-time DFA matching, no backtracking on huge pages
+except ImportError:
+    re2 = re
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Built once at import instead of per scraper instance / per page
+BLOCKED_DOMAINS = frozenset({
+    'estatesales.net', 'estatesales.org', 'godaddy.com',
+    'hibid.com', 'bluemoonestatesales.com', 'galleryauctions.com',
+    'facebook.com', 'twitter.com', 'linkedin.com', 'instagram.com'
+})
+# Subdomains of a blocked domain (m.facebook.com) - one C-level endswith call
+BLOCKED_SUFFIXES = tuple('.' + domain for domain in BLOCKED_DOMAINS)
+
+# Same character classes as VALID_EMAIL_RE, so every match is already well-formed
+EMAIL_RE = re2.compile(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}\b')
+# Same pattern over the raw response body - emails are ASCII, so pages are never decoded
+EMAIL_RE_B = re2.compile(rb'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}\b')
+VALID_EMAIL_RE = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
+PHONE_STRIP_RE = re.compile(r'[\(\)\-\s\.]')
+PHONE_TRIM_RE = re.compile(r'^[^\d]+|[^\d]+$')
+
+UNWANTED_PATTERNS = (
+    'wix', 'example', 'domain', 'sentry',
+    'webp', 'jpg', 'png', 'gif', 'svg'
+)
+INVALID_PATTERNS = (
+    'example', 'test', 'admin@admin', 'noreply',
+    'no-reply', 'webmaster', 'postmaster'
+)
+# One case-insensitive scan instead of a substring check per pattern
+BAD_EMAIL_RE = re.compile('|'.join(map(re.escape, UNWANTED_PATTERNS + INVALID_PATTERNS)), re.IGNORECASE)
+BAD_EMAIL_RE_B = re.compile(BAD_EMAIL_RE.pattern.encode(), re.IGNORECASE)
+
+# Links to these are never fetched - they cannot hold a contact page
+SKIP_EXTENSIONS = frozenset({'.jpg', '.jpeg', '.png', '.gif', '.webp', '.svg', '.pdf', '.doc', '.docx',
+                             '.xlsx', '.xls', '.zip', '.rar', '.mp3', '.mp4', '.avi', '.mov'})
+
+DNS_CACHE_TTL = 600  # seconds a resolved host is reused
+PER_HOST_CONNECTIONS = 8  # open connections per host in a shared session
+PAGE_TIMEOUT = 5  # seconds per request
+SITE_TIME_BUDGET = 20  # seconds per website crawl - then the emails found so far are kept
+MAX_PAGE_BYTES = 2_000_000  # bodies are cut off here when the server sends no Content-Length
+PAGE_CONTENT_TYPES = ('text/', 'application/xhtml', 'application/xml')
+
+# HTML parsing is CPU-bound - it runs in a process pool so it neither blocks
+# the event loop nor serializes on the GIL
+PARSE_WORKERS = max(1, (os.cpu_count() or 2) - 1)
+_parse_pool = None
+
+
+def get_parse_pool() -> ProcessPoolExecutor:
+    """Process pool shared by every scrape in this worker process, created on first use"""
+    global _parse_pool
+    if _parse_pool is None:
+        # spawn, not fork - the worker already runs threads (file watcher, sheet reads) by now
+        _parse_pool = ProcessPoolExecutor(max_workers=PARSE_WORKERS,
+                                          mp_context=multiprocessing.get_context('spawn'))
+    return _parse_pool
+
+
+def reset_parse_pool(broken_pool: ProcessPoolExecutor) -> None:
+    """Drop a pool that lost a worker process (e.g. OOM) - the next get_parse_pool() starts a fresh one"""
+    global _parse_pool
+    if _parse_pool is broken_pool:  # pages parsing concurrently all see the same broken pool
+        _parse_pool = None
+        broken_pool.shutdown(wait=False, cancel_futures=True)
+
+
+async def parse_in_pool(body: bytes, page_url: str, base_domain: str, find_links: bool) -> Tuple[Set[str], Set[str]]:
+    """Run parse_page() in the parse pool, replacing the pool once if one of its processes died"""
+    loop = asyncio.get_running_loop()
+    for attempt in range(2):
+        pool = get_parse_pool()
+        try:
+            return await loop.run_in_executor(pool, parse_page, body, page_url, base_domain, find_links)
+        except BrokenProcessPool:
+            logger.warning("Parse pool broke on %s - starting a new one", page_url)
+            reset_parse_pool(pool)
+            if attempt:
+                raise
+
+
+def create_session(limit: int, timeout: aiohttp.ClientTimeout, limit_per_host: int = 0) -> aiohttp.ClientSession:
+    """HTTP session with an aiodns resolver + cached lookups, so repeated hosts resolve once"""
+    connector = aiohttp.TCPConnector(
+        limit=limit,
+        limit_per_host=limit_per_host,
+        ssl=False,
+        resolver=aiohttp.AsyncResolver(),
+        use_dns_cache=True,
+        ttl_dns_cache=DNS_CACHE_TTL
+    )
+    return aiohttp.ClientSession(connector=connector, timeout=timeout)
+
+
+def get_domain(url: str) -> str:
+    """Extract domain from URL"""
+    try:
+        parsed = urlparse(url)
+        return parsed.netloc.lower().replace('www.', '')
+    except:
+        return ""
+
+
+def is_blocked_domain(url: str) -> bool:
+    """Check if URL belongs to blocked domains"""
+    if pd.isna(url) or not url or not isinstance(url, str):
+        return False
+    try:
+        # Sheets often hold bare domains - without '//' urlparse finds no host
+        parsed_url = urlparse(url if '//' in url else '//' + url)
+        domain = (parsed_url.hostname or '').replace('www.', '')
+        return domain in BLOCKED_DOMAINS or domain.endswith(BLOCKED_SUFFIXES)
+    except Exception:
+        return False
+
+
+def is_valid_email(email: str) -> bool:
+    """Validate email format and filter unwanted ones"""
+    # Basic email pattern, then unwanted patterns and common invalid emails
+    return bool(VALID_EMAIL_RE.match(email)) and not BAD_EMAIL_RE.search(email)
+
+
+def parse_page(body: bytes, page_url: str, base_domain: str, find_links: bool) -> Tuple[Set[str], Set[str]]:
+    """
+    Pull valid emails and internal links out of one raw page body (runs in the parse pool)
+    Links are resolved against page_url and kept when they stay on base_domain (as get_domain gives it)
+    Returns (emails, canonical links)
+    """
+    # One pass: matches are well-formed by construction, only the blacklist is left to check
+    emails = {email.decode('ascii') for email in EMAIL_RE_B.findall(body) if not BAD_EMAIL_RE_B.search(email)}
+    links = set()
+    
+    if find_links:
+        # lxml straight away - no BeautifulSoup object per tag, hrefs come back as plain strings
+        # (lxml picks the page's charset up from its <meta> tag)
+        try:
+            hrefs = lxml.html.fromstring(body).xpath('//a/@href')
+        except etree.ParserError:
+            hrefs = []  # empty page
+        for href in hrefs:
+            # Split once - domain check, extension check and canonical form share it
+            parts = urlsplit(urljoin(page_url, href))
+            # Only follow internal links to pages
+            if (parts.netloc.lower().replace('www.', '') == base_domain
+                    and os.path.splitext(parts.path)[1].lower() not in SKIP_EXTENSIONS):
+                links.add(canonical_link(parts))
+    
+    return emails, links
+
+
+@dataclass
+class CrawlContext:
+    """Per-site crawl state, so one scraper can crawl many sites at once"""
+    base_domain: str = ''  # parsed once per site - every crawled link stays on it
+    emails: Set[str] = field(default_factory=set)
+    visited_urls: Set[str] = field(default_factory=set)
+    scraped_domains: Dict[str, int] = field(default_factory=dict)
+
 
 class AsyncEmailScraper:
-    def __init__(self, max_concurrent=1000, timeout=5):
+    def __init__(self, max_concurrent=1000, timeout=PAGE_TIMEOUT):
         """
         max_concurrent: Number of simultaneous requests (200-500 recommended)
         timeout: Request timeout in seconds
+        Holds no per-site state - that lives in the CrawlContext of each scrape
         """
-        self.emails = set()
-        self.visited_urls = set()
-        self.scraped_domains = {}
         self.max_concurrent = max_concurrent
         self.timeout = aiohttp.ClientTimeout(total=timeout)
         
-        self.blocked_domains = [
-            'estatesales.net', 'estatesales.org', 'godaddy.com',
-            'hibid.com', 'bluemoonestatesales.com', 'galleryauctions.com',
-            'facebook.com', 'twitter.com', 'linkedin.com', 'instagram.com'
-        ]
+        self.blocked_domains = BLOCKED_DOMAINS
         
         self.MAX_URLS_PER_DOMAIN = 15
-        self.unwanted_patterns = [
-            'wix', 'example', 'domain', 'sentry',
-            'webp', 'jpg', 'png', 'gif', 'svg'
-        ]
         
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
@@ -42,53 +201,19 @@ class AsyncEmailScraper:
     
     def is_blocked_domain(self, url: str) -> bool:
         """Check if URL belongs to blocked domains"""
-        if pd.isna(url) or not url or not isinstance(url, str):
-            return False
-        try:
-            parsed_url = urlparse(url)
-            domain = parsed_url.netloc.lower().replace('www.', '')
-            return any(blocked in domain for blocked in self.blocked_domains)
-        except Exception:
-            return False
+        return is_blocked_domain(url)
     
     def get_domain(self, url: str) -> str:
         """Extract domain from URL"""
-        try:
-            parsed = urlparse(url)
-            return parsed.netloc.lower().replace('www.', '')
-        except:
-            return ""
+        return get_domain(url)
     
     def is_valid_email(self, email: str) -> bool:
         """Validate email format and filter unwanted ones"""
-        email = email.lower()
-        
-        # Basic email pattern
-        if not re.match(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$', email):
-            return False
-        
-        # Filter unwanted patterns
-        for pattern in self.unwanted_patterns:
-            if pattern in email:
-                return False
-        
-        # Filter common invalid emails
-        invalid_patterns = [
-            'example', 'test', 'admin@admin', 'noreply',
-            'no-reply', 'webmaster', 'postmaster'
-        ]
-        
-        for pattern in invalid_patterns:
-            if pattern in email:
-                return False
-        
-        return True
+        return is_valid_email(email)
     
     def extract_emails_from_text(self, text: str) -> Set[str]:
         """Extract valid emails from text"""
-        email_pattern = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
-        emails = set(re.findall(email_pattern, text))
-        return {email for email in emails if self.is_valid_email(email)}
+        return {email for email in EMAIL_RE.findall(text) if not BAD_EMAIL_RE.search(email)}
     
     async def fetch_url(self, session: aiohttp.ClientSession, url: str) -> tuple:
         """Fetch single URL asynchronously"""
@@ -99,8 +224,18 @@ class AsyncEmailScraper:
             
             async with session.get(url, headers=self.headers, ssl=False) as response:
                 if response.status == 200:
-                    text = await response.text()
-                    return url, text, None
+                    # Videos, archives and huge files are skipped before their body is downloaded
+                    content_type = response.headers.get('Content-Type', '')
+                    if content_type and not content_type.startswith(PAGE_CONTENT_TYPES):
+                        return url, None, "Not a page"
+                    if (response.content_length or 0) > MAX_PAGE_BYTES:
+                        return url, None, "Too large"
+                    # Raw bytes - skips charset detection and decoding of the whole page
+                    try:
+                        body = await response.content.readexactly(MAX_PAGE_BYTES)
+                    except asyncio.IncompleteReadError as e:
+                        body = e.partial  # the whole page, shorter than the cap
+                    return str(response.url), body, None
                 else:
                     return url, None, f"HTTP {response.status}"
         except asyncio.TimeoutError:
@@ -108,49 +243,39 @@ class AsyncEmailScraper:
         except Exception as e:
             return url, None, str(e)[:50]
     
-    async def scrape_single_page(self, session: aiohttp.ClientSession, url: str, base_url: str, max_depth: int = 2) -> Set[str]:
+    async def scrape_single_page(self, session: aiohttp.ClientSession, url: str,
+                                 ctx: CrawlContext, max_depth: int = 2) -> Set[str]:
         """Scrape a single page and find links"""
-        if url in self.visited_urls:
+        if url in ctx.visited_urls:
             return set()
         
-        self.visited_urls.add(url)
-        domain = self.get_domain(url)
+        ctx.visited_urls.add(url)
+        domain = ctx.base_domain
         
         # Check domain limit
-        if domain in self.scraped_domains:
-            if self.scraped_domains[domain] >= self.MAX_URLS_PER_DOMAIN:
+        if domain in ctx.scraped_domains:
+            if ctx.scraped_domains[domain] >= self.MAX_URLS_PER_DOMAIN:
                 return set()
-            self.scraped_domains[domain] += 1
+            ctx.scraped_domains[domain] += 1
         else:
-            self.scraped_domains[domain] = 1
+            ctx.scraped_domains[domain] = 1
         
-        url_result, html, error = await self.fetch_url(session, url)
+        final_url, body, error = await self.fetch_url(session, url)
         
-        if html:
-            # Extract emails
-            emails = self.extract_emails_from_text(html)
-            self.emails.update(emails)
-            
-            # Find links for deeper scraping
-            if max_depth > 0:
-                soup = BeautifulSoup(html, 'html.parser')
-                links = set()
-                
-                for link in soup.find_all('a', href=True):
-                    href = link['href']
-                    full_url = urljoin(base_url, href)
-                    
-                    # Only follow internal links
-                    if self.get_domain(full_url) == self.get_domain(base_url):
-                        if full_url not in self.visited_urls:
-                            links.add(full_url)
-                
-                return links
+        if body:
+            # Extract emails, and links for deeper scraping, off the event loop
+            # (relative links resolve against the page, after any redirect)
+            emails, links = await parse_in_pool(body, final_url, ctx.base_domain, max_depth > 0)
+            ctx.emails.update(emails)
+            return links - ctx.visited_urls
         
         return set()
     
-    async def scrape_website(self, url: str, max_depth: int = 2) -> Set[str]:
-        """Scrape website with depth-first approach"""
+    async def scrape_website(self, url: str, max_depth: int = 2, session: aiohttp.ClientSession = None) -> Set[str]:
+        """
+        Scrape website with depth-first approach
+        session: shared session of a batch; a private one is opened when omitted
+        """
         if not url or pd.isna(url):
             return set()
         
@@ -161,139 +286,167 @@ class AsyncEmailScraper:
         if not url.startswith(('http://', 'https://')):
             url = 'https://' + url
         
-        base_url = url
-        self.emails = set()
-        self.visited_urls = set()
-        self.scraped_domains = {}
+        base_url = canonical_link(url)
+        ctx = CrawlContext(base_domain=get_domain(base_url))
+        
+        if session is None:
+            async with create_session(self.max_concurrent, self.timeout) as own_session:
+                return await self.crawl_within_budget(own_session, base_url, max_depth, ctx)
+        return await self.crawl_within_budget(session, base_url, max_depth, ctx)
+    
+    async def crawl_within_budget(self, session: aiohttp.ClientSession, base_url: str, max_depth: int,
+                                  ctx: CrawlContext) -> Set[str]:
+        """crawl(), cut off after SITE_TIME_BUDGET so one slow site cannot hold a concurrency slot"""
+        try:
+            return await asyncio.wait_for(self.crawl(session, base_url, max_depth, ctx), SITE_TIME_BUDGET)
+        except asyncio.TimeoutError:
+            return ctx.emails
+    
+    async def crawl(self, session: aiohttp.ClientSession, base_url: str, max_depth: int, ctx: CrawlContext) -> Set[str]:
+        """
+        Crawl a site from base_url and return the emails found
+        A few workers pull (url, depth left) from a queue, so links found on a fast page are
+        fetched without waiting for the rest of its level; at most MAX_URLS_PER_DOMAIN are queued
+        """
+        queue = asyncio.Queue()
+        queue.put_nowait((base_url, max_depth))
+        queued = {base_url}
         
-        connector = aiohttp.TCPConnector(limit=self.max_concurrent, ssl=False)
+        async def crawl_pages():
+            while True:
+                page_url, depth_left = await queue.get()
+                try:
+                    links = await self.scrape_single_page(session, page_url, ctx, depth_left)
+                    for link in links if depth_left > 0 else ():
+                        if len(queued) >= self.MAX_URLS_PER_DOMAIN:
+                            break
+                        if link not in queued:
+                            queued.add(link)
+                            queue.put_nowait((link, depth_left - 1))
+                except Exception as e:
+                    # one bad page must not end the crawl
+                    logger.warning("Failed to scrape %s: %r", page_url, e)
+                finally:
+                    queue.task_done()
         
-        async with aiohttp.ClientSession(connector=connector, timeout=self.timeout) as session:
-            current_depth_urls = {url}
-            
-            for depth in range(max_depth + 1):
-                if not current_depth_urls:
-                    break
-                
-                # Create tasks for all URLs at current depth
-                tasks = [
-                    self.scrape_single_page(session, page_url, base_url, max_depth - depth)
-                    for page_url in current_depth_urls
-                    if page_url not in self.visited_urls
-                ]
-                
-                if not tasks:
-                    break
-                
-                # Execute all tasks concurrently
-                results = await asyncio.gather(*tasks, return_exceptions=True)
-                
-                # Collect URLs for next depth
-                next_depth_urls = set()
-                for result in results:
-                    if isinstance(result, set):
-                        next_depth_urls.update(result)
-                
-                current_depth_urls = next_depth_urls
+        workers = [asyncio.create_task(crawl_pages()) for _ in range(PER_HOST_CONNECTIONS)]
+        try:
+            await queue.join()
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
         
-        return self.emails
+        return ctx.emails
 
 
+@lru_cache(maxsize=8192)
 def format_phone_number(phone):
     """Format phone number"""
     if pd.isna(phone):
         return ""
     cleaned = str(phone)
-    cleaned = re.sub(r'[\(\)\-\s\.]', '', cleaned)
+    cleaned = PHONE_STRIP_RE.sub('', cleaned)
     cleaned = cleaned.replace('+1', '')
-    cleaned = re.sub(r'^[^\d]+|[^\d]+$', '', cleaned)
+    cleaned = PHONE_TRIM_RE.sub('', cleaned)
     if len(cleaned) == 10 and cleaned.isdigit():
         return f"+1{cleaned}"
     return cleaned
 
 
+# Column order of the result tuples returned by the scrape helpers below
+RESULT_COLUMNS = ['Company', 'Website', 'Phone Number', 'Email', 'City']
+
+
+# Stateless, so every company shares it
+company_scraper = AsyncEmailScraper(max_concurrent=50)  # Lower concurrency per site
+
+
+async def scrape_company(data: dict, semaphore: asyncio.Semaphore, session: aiohttp.ClientSession = None) -> Tuple[List[tuple], int]:
+    """
+    Scrape one company's website
+    'phone' in data is expected to be already formatted; session is the batch's shared session
+    Returns (rows laid out as RESULT_COLUMNS, number of rows holding a real email)
+    """
+    async with semaphore:  # Limit concurrent operations
+        website = data['website']
+        company = data['company']
+        formatted_phone = data.get('phone', '')
+        city = data.get('city', '')
+        
+        if pd.isna(website) or not website or not isinstance(website, str):
+            return [(company, 'No website', formatted_phone, 'No website provided', city)], 0
+        
+        if company_scraper.is_blocked_domain(website):
+            return [(company, website, formatted_phone, 'Blocked domain', city)], 0
+        
+        try:
+            emails = await company_scraper.scrape_website(website, max_depth=2, session=session)
+            
+            if emails:
+                return [(company, website, formatted_phone, email, city) for email in emails], len(emails)
+            else:
+                return [(company, website, formatted_phone, 'No email found', city)], 0
+        except Exception as e:
+            return [(company, website, formatted_phone, f'Error: {str(e)[:50]}', city)], 0
+
+
+def create_batch_session(max_concurrent: int) -> aiohttp.ClientSession:
+    """Session shared by every website of a batch - each site may have several pages in flight"""
+    return create_session(
+        max_concurrent * PER_HOST_CONNECTIONS,
+        aiohttp.ClientTimeout(total=PAGE_TIMEOUT),
+        limit_per_host=PER_HOST_CONNECTIONS
+    )
+
+
+async def iter_scraped_websites(websites_data: List[dict], max_concurrent: int = 200,
+                                session: aiohttp.ClientSession = None):
+    """
+    Yield scrape_company() results as soon as each website finishes
+    session: long-lived session to reuse (e.g. the worker's); a batch session is opened when omitted
+    Closing the generator early cancels the websites still in flight
+    """
+    if session is None:
+        # One connection pool and DNS cache for the whole batch instead of one per website
+        async with create_batch_session(max_concurrent) as batch_session:
+            async with aclosing(iter_scraped_websites(websites_data, max_concurrent, batch_session)) as scraped:
+                async for result in scraped:
+                    yield result
+        return
+    
+    semaphore = asyncio.Semaphore(max_concurrent)
+    tasks = [asyncio.create_task(scrape_company(data, semaphore, session)) for data in websites_data]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        for task in tasks:
+            task.cancel()
+        # Let cancelled scrapes unwind before their session is closed or reused
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
 async def scrape_multiple_websites(websites_data: List[dict], max_concurrent: int = 200) -> List[dict]:
     """
-    Scrape multiple websites concurrently - each gets its own scraper instance
+    Scrape multiple websites concurrently - each gets its own crawl state
+    'phone' values are raw; returns one dict per result row, keyed by RESULT_COLUMNS
     """
     results = []
     
-    # Semaphore to control concurrency
     semaphore = asyncio.Semaphore(max_concurrent)
+    async with create_batch_session(max_concurrent) as session:
+        completed_results = await asyncio.gather(
+            *[scrape_company({**data, 'phone': format_phone_number(data.get('phone', ''))}, semaphore, session)
+              for data in websites_data],
+            return_exceptions=True
+        )
     
-    async def scrape_one(data):
-        async with semaphore:  # Limit concurrent operations
-            website = data['website']
-            company = data['company']
-            phone = data.get('phone', '')
-            city = data.get('city', '')
-            formatted_phone = format_phone_number(phone)
-            
-            if pd.isna(website) or not website or not isinstance(website, str):
-                return {
-                    'Company': company,
-                    'Website': 'No website',
-                    'Phone Number': formatted_phone,
-                    'Email': 'No website provided',
-                    'City': city
-                }
-            
-            # CREATE FRESH SCRAPER FOR THIS WEBSITE ONLY
-            scraper = AsyncEmailScraper(max_concurrent=50)  # Lower concurrency per site
-            
-            if scraper.is_blocked_domain(website):
-                return {
-                    'Company': company,
-                    'Website': website,
-                    'Phone Number': formatted_phone,
-                    'Email': 'Blocked domain',
-                    'City': city
-                }
-            
-            try:
-                emails = await scraper.scrape_website(website, max_depth=2)
-                
-                if emails:
-                    return [
-                        {
-                            'Company': company,
-                            'Website': website,
-                            'Phone Number': formatted_phone,
-                            'Email': email,
-                            'City': city
-                        }
-                        for email in emails
-                    ]
-                else:
-                    return {
-                        'Company': company,
-                        'Website': website,
-                        'Phone Number': formatted_phone,
-                        'Email': 'No email found',
-                        'City': city
-                    }
-            except Exception as e:
-                return {
-                    'Company': company,
-                    'Website': website,
-                    'Phone Number': formatted_phone,
-                    'Email': f'Error: {str(e)[:50]}',
-                    'City': city
-                }
-    
-    # Create tasks for all websites
-    tasks = [scrape_one(data) for data in websites_data]
-    
-    # Execute all concurrently
-    completed_results = await asyncio.gather(*tasks, return_exceptions=True)
-    
-    # Flatten results
     for result in completed_results:
-        if isinstance(result, list):
-            results.extend(result)
-        elif isinstance(result, dict):
-            results.append(result)
-        elif isinstance(result, Exception):
+        if isinstance(result, Exception):
             logger.error(f"Error in scraping: {result}")
+            continue
+        rows, _ = result
+        results.extend(dict(zip(RESULT_COLUMNS, row)) for row in rows)
     
     return results
@@ -0,0 +1,70 @@
+# tests/test_excel_io.py
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from openpyxl import Workbook
+
+import excel_io
+
+
+def write_sheet_with_blank_rows(path):
+    """Header, a blank row between two data rows, then trailing rows that are only formatted"""
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.title = 'Leads'
+    sheet.append(['Title', 'Website', 'Phone Number'])
+    sheet.append(['Acme', 'acme.com', 5551234567])
+    sheet.append([])
+    sheet.append(['Beta', 'beta.com', None])
+    sheet['A9'].number_format = '0.00'
+    sheet['B12'] = ''
+    workbook.save(path)
+
+
+class CountSheetRowsTest(unittest.TestCase):
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix='.xlsx')
+        os.close(handle)
+        self.addCleanup(os.remove, self.path)
+        write_sheet_with_blank_rows(self.path)
+
+    def test_engines_agree_on_sheet_with_blank_rows(self):
+        # Header + Acme + blank + Beta - the blank in between stays, trailing ones do not
+        if excel_io.python_calamine is not None:
+            self.assertEqual(excel_io.count_sheet_rows(self.path, 'Leads'), 4)
+        with mock.patch.object(excel_io, 'python_calamine', None):
+            self.assertEqual(excel_io.count_sheet_rows(self.path, 'Leads'), 4)
+
+    def test_matches_pandas_row_count(self):
+        import pandas as pd
+        rows = len(pd.read_excel(self.path, 'Leads', engine='openpyxl'))
+        self.assertEqual(excel_io.count_sheet_rows(self.path, 'Leads'), rows + 1)
+
+
+class ReadInputColumnsTest(unittest.TestCase):
+    def test_keeps_the_rows_pandas_keeps(self):
+        handle, path = tempfile.mkstemp(suffix='.xlsx')
+        os.close(handle)
+        self.addCleanup(os.remove, path)
+        workbook = Workbook()
+        sheet = workbook.active
+        sheet.title = 'Leads'
+        sheet.append(['Title', 'Website', 'Notes'])
+        sheet.append(['Acme', 'acme.com', None])
+        sheet.append([])
+        sheet.append([None, None, 'only a note'])  # still a row, reported as "No website"
+        sheet.append(['Beta', 'beta.com', None])
+        sheet['A9'].number_format = '0.00'
+        workbook.save(path)
+        
+        expected = {'Title': ['Acme', None, None, 'Beta'], 'Website': ['acme.com', None, None, 'beta.com']}
+        if excel_io.python_calamine is not None:
+            self.assertEqual(excel_io.read_input_columns(path, 'Leads'), expected)
+        with mock.patch.object(excel_io, 'python_calamine', None):
+            self.assertEqual(excel_io.read_input_columns(path, 'Leads'), expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
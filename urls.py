@@ -0,0 +1,35 @@
+# urls.py
+from urllib.parse import urlsplit, urlunsplit
+
+TRACKING_PARAMS = frozenset({'fbclid', 'gclid', 'ref'})  # plus any utm_*
+
+
+def website_key(website: str) -> str:
+    """
+    Dedupe key for a sheet's website: scheme, www., host case and trailing slash don't matter
+    A value urlsplit rejects (e.g. 'http://[abc') is keyed by its own lowercased text
+    """
+    website = website.strip()
+    try:
+        parts = urlsplit(website if '://' in website else 'http://' + website)
+    except ValueError:
+        return website.lower()
+    host = parts.netloc.lower()
+    if host.startswith('www.'):
+        host = host[4:]
+    key = host + parts.path.rstrip('/')
+    return f"{key}?{parts.query}" if parts.query else key
+
+
+def canonical_link(url) -> str:
+    """
+    One spelling per page: lowercase scheme/host, no fragment, tracking params or trailing slash
+    url may be a string or an already split SplitResult
+    """
+    parts = urlsplit(url) if isinstance(url, str) else url
+    query = '&'.join(
+        param for param in parts.query.split('&')
+        if param and not (param.split('=', 1)[0].lower().startswith('utm_')
+                          or param.split('=', 1)[0].lower() in TRACKING_PARAMS)
+    )
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path.rstrip('/'), query, ''))
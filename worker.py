@@ -1,18 +1,42 @@
 # worker.py
 import asyncio
-import time
+import signal
+from contextlib import aclosing
 import pandas as pd
 from jobs import JobManager, JobStatus, JobControl
-from scraper_async import scrape_multiple_websites
+from scraper_async import (iter_scraped_websites, create_batch_session, format_phone_number,
+                           is_blocked_domain, RESULT_COLUMNS)
+from excel_io import read_sheet_names, read_input_columns, ResultWriter
+from urls import website_key
 import os
 import logging
 
+try:
+    from watchdog.observers import Observer
+    from watchdog.events import FileSystemEventHandler
+except ImportError:
+    Observer = None  # fall back to polling the queue every POLL_INTERVAL
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+SITE_CONCURRENCY = 50  # websites scraped at the same time per job
+CONTROL_CHECK_EVERY = 50  # finished websites between control checks / output flushes
+JOB_FLUSH_INTERVAL = 1.0  # seconds between writes of buffered progress to the job file
+POLL_INTERVAL = 5  # seconds between queue checks without file watching
+WATCHED_POLL_INTERVAL = 30  # safety re-check while watching (missed events, network mounts)
+
+
+def get_output_filename(prefix: str, job: dict) -> str:
+    """Output file name for a job, e.g. scraped_leads.csv"""
+    # Jobs queued before output_format existed keep their .xlsx output
+    if job.get('output_format', 'xlsx') == 'csv':
+        return f"{prefix}_{os.path.splitext(job['filename'])[0]}.csv"
+    return f"{prefix}_{job['filename']}"
 
-async def process_job_async(job_id: str):
-    """Process a single job with pause/stop support"""
+
+async def process_job_async(job_id: str, session=None):
+    """Process a single job with pause/stop support (session: the worker's long-lived HTTP session)"""
     job_manager = JobManager()
     job = job_manager.get_job(job_id)
     
@@ -22,6 +46,14 @@ async def process_job_async(job_id: str):
     
     logger.info(f"🚀 Starting job {job_id} - {job['filename']}")
     
+    # Rows are streamed to a hidden .part file and renamed once the job ends - the job id keeps
+    # jobs queued on the same upload (and claimed by other workers) off each other's file
+    output_filename = get_output_filename('scraped', job)
+    temp_path = os.path.join(job_manager.outputs_dir, f"{output_filename}.{job_id}.part")
+    writer = None
+    total_emails = 0
+    flusher = asyncio.create_task(flush_job_periodically(job_manager, job_id))
+    
     try:
         # Update to processing
         job_manager.update_job(job_id, {
@@ -31,13 +63,31 @@ async def process_job_async(job_id: str):
         
         # Read the uploaded file
         filepath = os.path.join(job_manager.uploads_dir, job['filename'])
-        excel_file = pd.ExcelFile(filepath)
+        all_sheet_names = read_sheet_names(filepath)
+        writer = ResultWriter(temp_path, RESULT_COLUMNS, xlsx=not output_filename.endswith('.csv'))
+        
+        sheet_names = [all_sheet_names[idx] for idx in job['selected_sheets']]
+        total_sheets = len(sheet_names)
         
-        all_results = []
-        total_sheets = len(job['selected_sheets'])
+        # Sheets are independent - parse the next one in a thread while the current one is scraped
+        def parse_sheet_in_background(num):
+            # Sheets without Website/Title come back empty after their header row
+            return asyncio.create_task(asyncio.to_thread(read_input_columns, filepath, sheet_names[num],
+                                                         ('Website', 'Title')))
         
-        for sheet_num, sheet_idx in enumerate(job['selected_sheets']):
-            sheet_name = excel_file.sheet_names[sheet_idx]
+        next_sheet = parse_sheet_in_background(0) if sheet_names else None
+        
+        # Brands repeat across city sheets - each website is scraped once per job and its
+        # emails (or 'No email found' / error) reused for every row that lists it
+        site_results = {}
+        
+        def write_site_rows(sheet_rows, results):
+            writer.write_rows(
+                (data['company'], data['website'], data['phone'], result, data['city'])
+                for data in sheet_rows for result in results
+            )
+        
+        for sheet_num, sheet_name in enumerate(sheet_names):
             logger.info(f"📄 Processing sheet: {sheet_name}")
             
             # Check control signal
@@ -46,8 +96,7 @@ async def process_job_async(job_id: str):
             if control == JobControl.STOP.value:
                 logger.warning(f"⏹️ Job {job_id} stopped by user")
                 # Save partial results
-                if all_results:
-                    await save_partial_results(job_id, all_results, job_manager)
+                await save_partial_results(job_id, writer, temp_path, total_emails, job_manager)
                 job_manager.update_job(job_id, {
                     'status': JobStatus.STOPPED.value,
                     'completed_at': pd.Timestamp.now().isoformat()
@@ -69,8 +118,7 @@ async def process_job_async(job_id: str):
                         break
                     elif control == JobControl.STOP.value:
                         logger.warning(f"⏹️ Job {job_id} stopped while paused")
-                        if all_results:
-                            await save_partial_results(job_id, all_results, job_manager)
+                        await save_partial_results(job_id, writer, temp_path, total_emails, job_manager)
                         job_manager.update_job(job_id, {
                             'status': JobStatus.STOPPED.value,
                             'completed_at': pd.Timestamp.now().isoformat()
@@ -81,72 +129,114 @@ async def process_job_async(job_id: str):
             job_manager.update_job(job_id, {
                 'current_sheet': sheet_name,
                 'progress': (sheet_num / total_sheets) * 100
-            })
+            }, flush=False)
             
-            df = excel_file.parse(sheet_name)
+            columns = await next_sheet
+            if sheet_num + 1 < total_sheets:
+                next_sheet = parse_sheet_in_background(sheet_num + 1)
             
-            if 'Website' not in df.columns or 'Title' not in df.columns:
+            if 'Website' not in columns or 'Title' not in columns:
                 logger.warning(f"Sheet {sheet_name} missing required columns")
                 continue
             
-            # Prepare data for batch processing
-            websites_data = []
-            for _, row in df.iterrows():
-                websites_data.append({
-                    'company': row['Title'],
-                    'website': row['Website'],
-                    'phone': row.get('Phone Number', ''),
+            # Prepare data for batch processing (plain column lists straight from the sheet)
+            websites = columns['Website']
+            companies = columns['Title']
+            phones = columns.get('Phone Number') or [''] * len(websites)
+            formatted_phones = [format_phone_number(phone) for phone in phones]
+            has_website = [isinstance(w, str) and w != '' for w in websites]
+            blocked = [ok and is_blocked_domain(w) for w, ok in zip(websites, has_website)]
+            
+            # Rows without a usable website, or on a blocked domain, are answered here, never batched
+            writer.write_rows(
+                (company, 'No website', phone, 'No website provided', sheet_name)
+                for company, phone, ok in zip(companies, formatted_phones, has_website)
+                if not ok
+            )
+            writer.write_rows(
+                (company, website, phone, 'Blocked domain', sheet_name)
+                for company, website, phone, is_blocked in zip(companies, websites, formatted_phones, blocked)
+                if is_blocked
+            )
+            websites_data = [
+                {
+                    'company': company,
+                    'website': website,
+                    'phone': phone,
                     'city': sheet_name
-                })
+                }
+                for company, website, phone, ok, is_blocked
+                in zip(companies, websites, formatted_phones, has_website, blocked)
+                if ok and not is_blocked
+            ]
             
-            job_manager.update_job(job_id, {'total_rows': len(websites_data)})
+            rows_by_site = {}
+            for data in websites_data:
+                rows_by_site.setdefault(website_key(data['website']), []).append(data)
             
-            # Process in smaller batches to check control signals frequently
-            batch_size = 50  # Process 50 websites at a time
-            for batch_start in range(0, len(websites_data), batch_size):
-                # Check control again
-                control = job_manager.get_job_control(job_id)
-                if control in [JobControl.STOP.value, JobControl.PAUSE.value]:
-                    break
-                
-                batch_end = min(batch_start + batch_size, len(websites_data))
-                batch_data = websites_data[batch_start:batch_end]
-                
-                logger.info(f"⚡ Scraping batch {batch_start}-{batch_end} of {len(websites_data)}")
-                
-                batch_results = await scrape_multiple_websites(batch_data, max_concurrent=1000)
-                all_results.extend(batch_results)
-                
-                # Update progress
-                progress = ((sheet_num + (batch_end / len(websites_data))) / total_sheets) * 100
-                job_manager.update_job(job_id, {
-                    'progress': progress,
-                    'current_row': batch_end
-                })
+            # Websites already scraped for an earlier sheet are answered from the cache
+            for key, sheet_rows in rows_by_site.items():
+                if key in site_results:
+                    results, found = site_results[key]
+                    write_site_rows(sheet_rows, results)
+                    total_emails += found * len(sheet_rows)
+            websites_data = [sheet_rows[0] for key, sheet_rows in rows_by_site.items() if key not in site_results]
+            
+            job_manager.update_job(job_id, {'total_rows': len(websites_data)}, flush=False)
             
-            logger.info(f"✅ Sheet {sheet_name} complete: {len(all_results)} total results")
+            # Sliding window: a new website starts as soon as any finishes, so one
+            # slow site no longer holds up a whole batch
+            done = 0
+            last_percent = -1
+            async with aclosing(iter_scraped_websites(websites_data, max_concurrent=SITE_CONCURRENCY, session=session)) as scraped:
+                async for rows, found in scraped:
+                    # rows belong to the first sheet row of that website; the others share its results
+                    key = website_key(rows[0][1])
+                    site_results[key] = ([row[3] for row in rows], found)
+                    writer.write_rows(rows)
+                    write_site_rows(rows_by_site[key][1:], site_results[key][0])
+                    total_emails += found * len(rows_by_site[key])
+                    done += 1
+                    
+                    # Progress moves in whole percents - about 100 updates per job whatever its size
+                    progress = ((sheet_num + (done / len(websites_data))) / total_sheets) * 100
+                    if int(progress) != last_percent:
+                        last_percent = int(progress)
+                        job_manager.update_job(job_id, {
+                            'progress': progress,
+                            'current_row': done
+                        }, flush=False)
+                    
+                    if done % CONTROL_CHECK_EVERY and done != len(websites_data):
+                        continue
+                    
+                    logger.info(f"⚡ Scraped {done} of {len(websites_data)} websites")
+                    writer.flush()
+                    
+                    # Check control again
+                    control = job_manager.get_job_control(job_id)
+                    if control in [JobControl.STOP.value, JobControl.PAUSE.value]:
+                        break
+            
+            logger.info(f"✅ Sheet {sheet_name} complete: {writer.rows_written} total results")
         
         # Save final results
-        if all_results:
-            results_df = pd.DataFrame(all_results)
-            output_filename = f"scraped_{job['filename']}"
-            output_path = os.path.join(job_manager.outputs_dir, output_filename)
-            results_df.to_excel(output_path, index=False)
-            
-            total_emails = len([r for r in all_results 
-                              if not r['Email'].startswith(('No', 'Error', 'Blocked'))])
+        writer.close()
+        if writer.rows_written:
+            os.replace(temp_path, os.path.join(job_manager.outputs_dir, output_filename))
             
             job_manager.update_job(job_id, {
                 'status': JobStatus.COMPLETED.value,
                 'completed_at': pd.Timestamp.now().isoformat(),
                 'progress': 100,
                 'total_emails': total_emails,
-                'total_rows': len(results_df),
+                'total_rows': writer.rows_written,
                 'output_file': output_filename
             })
             
-            logger.info(f"🎉 Job {job_id} completed! Found {total_emails} emails in {len(results_df)} rows")
+            logger.info(f"🎉 Job {job_id} completed! Found {total_emails} emails in {writer.rows_written} rows")
         else:
+            os.remove(temp_path)
             job_manager.update_job(job_id, {
                 'status': JobStatus.FAILED.value,
                 'completed_at': pd.Timestamp.now().isoformat(),
@@ -155,56 +245,105 @@ async def process_job_async(job_id: str):
             
     except Exception as e:
         logger.error(f"❌ Job {job_id} failed: {str(e)}")
+        # Keep whatever was scraped before the failure
+        if writer is not None:
+            try:
+                await save_partial_results(job_id, writer, temp_path, total_emails, job_manager)
+            except Exception as save_error:
+                logger.error(f"❌ Could not save partial results: {str(save_error)}")
         job_manager.update_job(job_id, {
             'status': JobStatus.FAILED.value,
             'completed_at': pd.Timestamp.now().isoformat(),
             'error': str(e)
         })
+    finally:
+        flusher.cancel()
+        job_manager.flush_job(job_id)
+
+
+async def flush_job_periodically(job_manager: JobManager, job_id: str):
+    """Write buffered progress updates to the job file at most once per JOB_FLUSH_INTERVAL"""
+    while True:
+        await asyncio.sleep(JOB_FLUSH_INTERVAL)
+        job_manager.flush_job(job_id)
 
 
-async def save_partial_results(job_id: str, results: list, job_manager: JobManager):
-    """Save partial results when job is stopped"""
-    if not results:
+async def save_partial_results(job_id: str, writer: ResultWriter, temp_path: str, total_emails: int, job_manager: JobManager):
+    """Close the streamed output and keep it as partial results when job is stopped"""
+    writer.close()
+    if not writer.rows_written:
+        os.remove(temp_path)
         return
     
     job = job_manager.get_job(job_id)
-    results_df = pd.DataFrame(results)
-    output_filename = f"partial_{job['filename']}"
-    output_path = os.path.join(job_manager.outputs_dir, output_filename)
-    results_df.to_excel(output_path, index=False)
-    
-    total_emails = len([r for r in results 
-                      if not r['Email'].startswith(('No', 'Error', 'Blocked'))])
+    output_filename = get_output_filename('partial', job)
+    os.replace(temp_path, os.path.join(job_manager.outputs_dir, output_filename))
     
     job_manager.update_job(job_id, {
         'total_emails': total_emails,
-        'total_rows': len(results_df),
+        'total_rows': writer.rows_written,
         'output_file': output_filename
     })
     
-    logger.info(f"💾 Saved partial results: {len(results)} rows, {total_emails} emails")
+    logger.info(f"💾 Saved partial results: {writer.rows_written} rows, {total_emails} emails")
+
+
+def watch_pending_jobs(job_manager: JobManager, on_queued) -> bool:
+    """Call on_queued (from a watchdog thread) whenever a marker appears in jobs/pending; False without watchdog"""
+    if Observer is None:
+        return False
+    
+    class PendingJobHandler(FileSystemEventHandler):
+        def on_created(self, event):
+            on_queued()
+    
+    observer = Observer()
+    observer.daemon = True
+    observer.schedule(PendingJobHandler(), job_manager.pending_dir)
+    observer.start()
+    return True
 
 
-def worker_loop():
-    """Main worker loop"""
+async def worker_loop():
+    """
+    Main worker loop - one event loop and one HTTP session for the life of the process,
+    so DNS cache and keep-alive connections carry over from job to job
+    """
     job_manager = JobManager()
+    loop = asyncio.get_running_loop()
+    wake = asyncio.Event()
+    watching = watch_pending_jobs(job_manager, lambda: loop.call_soon_threadsafe(wake.set))
+    poll_interval = WATCHED_POLL_INTERVAL if watching else POLL_INTERVAL
+    
+    # supervisord stops workers with SIGTERM - unwind so the session is closed cleanly
+    loop.add_signal_handler(signal.SIGTERM, asyncio.current_task().cancel)
     logger.info("🚀 Async worker started - waiting for jobs...")
     
-    while True:
-        try:
-            pending_jobs = job_manager.get_pending_jobs()
-            
-            if pending_jobs:
-                job = pending_jobs[0]
-                logger.info(f"📝 Found pending job: {job['job_id']} - {job['filename']}")
-                asyncio.run(process_job_async(job['job_id']))
-            else:
-                time.sleep(5)
+    async with create_batch_session(SITE_CONCURRENCY) as session:
+        while True:
+            try:
+                wake.clear()  # a job queued from here on wakes the wait below straight away
+                pending_jobs = job_manager.get_pending_jobs()
+                
+                # Several worker processes poll the same queue - take the first job nobody else claimed
+                job = next((j for j in pending_jobs if job_manager.claim_job(j['job_id'])), None)
                 
-        except Exception as e:
-            logger.error(f"❌ Worker error: {str(e)}")
-            time.sleep(10)
+                if job:
+                    logger.info(f"📝 Found pending job: {job['job_id']} - {job['filename']}")
+                    await process_job_async(job['job_id'], session)
+                else:
+                    try:
+                        await asyncio.wait_for(wake.wait(), poll_interval)
+                    except asyncio.TimeoutError:
+                        pass
+                    
+            except Exception as e:
+                logger.error(f"❌ Worker error: {str(e)}")
+                await asyncio.sleep(10)
 
 
 if __name__ == "__main__":
-    worker_loop()
+    try:
+        asyncio.run(worker_loop())
+    except asyncio.CancelledError:
+        logger.info("👋 Worker stopped")